@@ -11,6 +11,10 @@ from .config import Config
 from .database import get_db_connection, init_db, close_db_connection
 from .auth_utils import require_auth
 from .routes import register_routes
+from .utils.static_files import get_asset_manifest
+from .utils.session_sweeper import init_session_sweeper
+from .utils.response_encoding import init_response_encoding
+from .utils.metrics import init_metrics
 
 
 def create_app(config_object=None):
@@ -22,10 +26,14 @@ def create_app(config_object=None):
     
     app.config.from_object(config_object or Config)
     CORS(app, supports_credentials=True)
+    init_metrics(app)
+    init_response_encoding(app)
 
     init_db(app)
     register_routes(app)
     app.teardown_appcontext(close_db_connection)
+    get_asset_manifest(app)
+    init_session_sweeper(app)
 
     return app
 
@@ -1,31 +1,58 @@
-import hashlib
 import secrets
 from datetime import datetime
 from functools import wraps
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 from .database import get_db_connection
+from .utils.session_cache import SessionCache
+from .utils.passwords import get_password_hasher
 
 def hash_password(password: str) -> str:
-    """Simple password hashing (use bcrypt in production)."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash a password with the current KDF (runs on the bounded KDF pool)."""
+    return get_password_hasher().hash(password)
+
+def verify_password(password: str, stored: str):
+    """Check a password against a stored hash; returns (ok, new_hash_or_None)."""
+    return get_password_hasher().verify(password, stored)
 
 def generate_session_token() -> str:
     """Generate a secure random session token."""
     return secrets.token_urlsafe(32)
 
-def get_current_user():
-    """Get current user from session token in Authorization header."""
+def get_session_cache() -> SessionCache:
+    """Return the per-process session cache, creating it on first use."""
+    cache = current_app.extensions.get('session_cache')
+    if cache is None:
+        cache = SessionCache(
+            maxsize=current_app.config.get('SESSION_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('SESSION_CACHE_TTL', 30)
+        )
+        current_app.extensions['session_cache'] = cache
+    return cache
+
+def get_bearer_token():
+    """Return the bearer token from the Authorization header, if any."""
     token_header = request.headers.get('Authorization')
     if not token_header or not token_header.startswith('Bearer '):
         return None
+    return token_header[7:]  # strip "Bearer "
+
+def get_current_user():
+    """Get current user from session token in Authorization header."""
+    token = get_bearer_token()
+    if not token:
+        return None
+
+    cache = get_session_cache()
+    user = cache.get(token)
+    if user is not None:
+        return user
 
-    token = token_header[7:]  # strip "Bearer "
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
             """
-            SELECT u.id, u.username, u.email, u.full_name
+            SELECT u.id, u.username, u.email, u.full_name, s.expires_at
             FROM Sessions s
             JOIN Users u ON s.user_id = u.id
             WHERE s.session_token = ?
@@ -35,15 +62,25 @@ def get_current_user():
             (token, datetime.now().isoformat())
         )
         row = cursor.fetchone()
-        return dict(row) if row else None
+        if not row:
+            return None
+
+        user = dict(row)
+        expires_at = user.pop('expires_at')
+        cache.put(token, user, expires_at)
+        return user
     except Exception:
         return None
 
 def require_auth(f):
-    """Decorator to require authentication."""
+    """
+    Decorator to require authentication. Operations of a /api/batch call
+    run as the user run_batch authenticated (g._batch_user); every other
+    request authenticates its own token.
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
-        user = get_current_user()
+        user = g.get('_batch_user') or get_current_user()
         if not user:
             return jsonify({'success': False, 'error': 'Authentication required'}), 401
         g.current_user = user
@@ -9,17 +9,94 @@ BASE_DIR = os.path.abspath(
 class Config:
     """Application configuration"""
     UPLOAD_FOLDER = "/app/uploads"
+    PHOTO_MAX_BYTES = 10 * 1024 * 1024
+    PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+    PHOTO_MAX_PENDING = 16
+    PHOTO_VARIANT_SIZES = (64, 256, 1024)
+    PHOTO_QUALITY = 80
+
+    # Static files. The manifest of FRONTEND_DIR is built once at
+    # startup; restart (or redeploy) to pick up a new frontend build.
+    # Set the *_ACCEL_PREFIX values to nginx `internal` locations to
+    # hand file bodies off via X-Accel-Redirect.
+    FRONTEND_DIR = os.getenv("FRONTEND_DIR", os.path.join(os.getcwd(), "frontend"))
+    STATIC_MAX_AGE = 0          # unhashed files (index.html) revalidate via ETag
+    STATIC_ACCEL_PREFIX = os.getenv("STATIC_ACCEL_PREFIX")
+    UPLOADS_MAX_AGE = 86400
+    UPLOADS_ACCEL_PREFIX = os.getenv("UPLOADS_ACCEL_PREFIX")
+
     DB_PATH = os.getenv(
         "SQLITE_DB_PATH",
         os.path.join(BASE_DIR, "data", "familytree.db")
     )
 
+    # Per-process SQLite connection pool
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+    DB_POOL_TIMEOUT = 10.0
+    DB_POOL_HEALTHCHECK_INTERVAL = 30.0
+    DB_CACHED_STATEMENTS = 256
+    DB_CACHE_SIZE_KIB = 16384
+    DB_MMAP_SIZE = 256 * 1024 * 1024
+    DB_TEMP_STORE = "MEMORY"
+
     RELATION_TYPES = [
         'father', 'mother', 'brother',
         'sister', 'husband', 'wife'
     ]
 
+    # Relationships read as "person1 is <type> of person2"
+    PARENT_RELATION_TYPES = ['father', 'mother']
+    SPOUSE_RELATION_TYPES = ['husband', 'wife']
+    SIBLING_RELATION_TYPES = ['brother', 'sister']
+    MAX_LINEAGE_DEPTH = 50
+
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+
+    MAP_POINTS_LIMIT = 5000
+    MAP_NEAREST_MAX_K = 100
+    MAP_MAX_ZOOM = 22
+    MAP_CLUSTER_CELLS_PER_TILE = 4        # 64px cells on 256px tiles
+    MAP_CLUSTER_MAX_TILES = 64
+    MAP_CLUSTER_REPRESENTATIVES = 3
+    MAP_CLUSTER_CACHE_SIZE = 4096         # tiles, per process
+
+    BATCH_MAX_OPERATIONS = 200
+
+    # Prometheus metrics at /api/metrics (per process)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token required to scrape, if set
+
+    # SQL tracing (utils/sql_trace). N+1 detection runs in debug mode or
+    # when SQL_DETECT_N_PLUS_ONE=1.
+    SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "100"))  # 0 disables the slow-query log
+    SQL_EXPLAIN_SLOW = True
+    SQL_DETECT_N_PLUS_ONE = os.getenv("SQL_DETECT_N_PLUS_ONE", "0") == "1"
+    SQL_N_PLUS_ONE_THRESHOLD = 20
+
+    # Response compression (brotli is used only if installed)
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+
+    IMPORT_BATCH_SIZE = 10000
+    EXPORT_BATCH_SIZE = 1000
+
     SESSION_EXPIRY_DAYS = 7
+    SESSION_MAX_PER_USER = int(os.getenv("SESSION_MAX_PER_USER", "10"))
+    SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", "300"))  # 0 disables
+    SESSION_SWEEP_BATCH_SIZE = 500
+    SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+    SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "30"))
     MIN_PASSWORD_LENGTH = 6
 
+    # Password KDF (scrypt, ~16 MiB and tens of ms per hash at N=2**14).
+    # Raising the cost upgrades existing hashes on each user's next login.
+    SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 14)))
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    KDF_WORKERS = int(os.getenv("KDF_WORKERS", "2"))
+    KDF_MAX_PENDING = 32
+    KDF_TIMEOUT = 10.0
+
 
@@ -1,7 +1,15 @@
+import importlib.util
 import os
+import queue
 import sqlite3
+import threading
+import time
 from flask import g, current_app
 
+from .utils.sql_trace import get_sql_tracer
+
+_pool_lock = threading.Lock()
+
 
 def init_db(app):
 
@@ -37,7 +45,9 @@ def _ensure_migration_table(conn):
 
 def _apply_migrations(conn):
     """
-    Execute all pending SQL migration files in order.
+    Execute all pending migration files in order. Most are .sql scripts;
+    a .py file is a data migration whose migrate(conn) is called inside
+    a transaction (for backfills SQL alone cannot compute).
     """
     migrations_dir = os.path.abspath(
         os.path.join(
@@ -60,7 +70,7 @@ def _apply_migrations(conn):
 
     migration_files = sorted(
         f for f in os.listdir(migrations_dir)
-        if f.endswith(".sql")
+        if f.endswith((".sql", ".py"))
     )
 
     for filename in migration_files:
@@ -69,11 +79,12 @@ def _apply_migrations(conn):
 
         filepath = os.path.join(migrations_dir, filename)
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            sql = f.read()
-
         try:
-            conn.executescript(sql)
+            if filename.endswith(".py"):
+                _run_python_migration(conn, filepath)
+            else:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    conn.executescript(f.read())
             conn.execute(
                 "INSERT INTO schema_migrations (filename) VALUES (?)",
                 (filename,)
@@ -84,25 +95,328 @@ def _apply_migrations(conn):
             raise RuntimeError(f"Migration failed: {filename}")
 
 
-def get_db_connection():
+def _run_python_migration(conn, filepath):
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    spec = importlib.util.spec_from_file_location(f"_migration_{name}", filepath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    module.migrate(conn)
+
+
+class TimedCursor(sqlite3.Cursor):
     """
-    Return a sqlite3 connection (row factory = sqlite3.Row).
-    One connection per request context.
+    Cursor that reports each statement to its TimedConnection. A query
+    is timed until its rows run out: execute, then every fetch (or
+    iteration batch) until the last, so the steps that walk a scan count
+    as well as planning and the first row. A query whose rows are not
+    all read is reported when the cursor is closed or re-executed, or
+    at the latest when its connection's counters are taken at the end
+    of the request (TimedConnection.report_unread), even if the cursor
+    has been dropped by then.
     """
-    conn = getattr(g, "_sqlite_conn", None)
 
-    if conn is None:
+    _pending = None  # [sql, parameters, seconds] of a query with rows left
+
+    def _report(self):
+        pending, self._pending = self._pending, None
+        # report_unread may have counted it already
+        if pending is not None and self.connection._unread.pop(id(pending), None):
+            self.connection.count_sql(*pending)
+
+    def _fetched(self, started, exhausted):
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+            if exhausted:
+                self._report()
+
+    def execute(self, sql, parameters=()):
+        self._report()
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except BaseException:
+            self.connection.count_sql(sql, parameters, time.perf_counter() - started)
+            raise
+        seconds = time.perf_counter() - started
+        if self.description is None:
+            self.connection.count_sql(sql, parameters, seconds)
+        else:
+            self._pending = [sql, parameters, seconds]
+            self.connection._unread[id(self._pending)] = self._pending
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._report()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.count_sql(sql, None, time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        self._report()
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self.connection.count_sql(sql_script, None, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = None
+        try:
+            row = super().fetchone()
+        finally:
+            self._fetched(started, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        started = time.perf_counter()
+        rows = []
+        try:
+            rows = super().fetchmany(size)
+        finally:
+            self._fetched(started, len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._fetched(started, True)
+
+    def __iter__(self):
+        # Iterating fetches in batches, so rows are timed per batch
+        # rather than at a clock read or two per row
+        while True:
+            rows = self.fetchmany(256)
+            yield from rows
+            if len(rows) < 256:
+                return
+
+    def close(self):
+        self._report()
+        super().close()
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection that counts statements and the time spent running them
+    (see TimedCursor), read per request by utils/metrics. `on_statement`,
+    if set, is called with each one as it completes (the request's
+    utils/sql_trace.RequestTrace).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.on_statement = None
+        self._unread = {}  # id -> TimedCursor._pending of queries with rows left
+
+    def count_sql(self, sql, parameters, seconds):
+        self.sql_statements += 1
+        self.sql_seconds += seconds
+        if self.on_statement is not None:
+            self.on_statement(self, sql, parameters, seconds)
+
+    def report_unread(self):
+        """Count the queries whose rows were not all read, as they stand."""
+        while self._unread:
+            _, pending = self._unread.popitem()
+            self.count_sql(*pending)
+
+    def take_sql_counters(self):
+        """(statements, seconds) since the last call; resets both."""
+        self.report_unread()
+        counters = (self.sql_statements, self.sql_seconds)
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        return counters
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+class ConnectionPool:
+    """
+    Per-process pool of pre-configured sqlite3 connections.
+
+    Connections keep their page cache and statement cache between
+    requests. Idle connections are handed out LIFO so the warmest one is
+    reused first, and are re-validated with SELECT 1 if they have been
+    idle longer than `healthcheck_interval` seconds.
+    """
+
+    def __init__(self, db_path, size=4, timeout=10.0, cached_statements=256,
+                 cache_size_kib=16384, mmap_size=268435456, temp_store="MEMORY",
+                 healthcheck_interval=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.temp_store = temp_store
+        self.healthcheck_interval = healthcheck_interval
+        self.pid = os.getpid()
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            "created": 0, "reused": 0, "discarded": 0,
+            "waits": 0, "healthchecks": 0
+        }
+
+    def _connect(self):
         conn = sqlite3.connect(
-            current_app.config["DB_PATH"],
+            self.db_path,
             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
-            check_same_thread=False
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=TimedConnection
         )
         conn.row_factory = sqlite3.Row
 
         conn.execute("PRAGMA foreign_keys = ON;")
         conn.execute("PRAGMA journal_mode = WAL;")
         conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)};")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)};")
+        conn.execute(f"PRAGMA temp_store = {self.temp_store};")
+        return conn
+
+    def acquire(self):
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._created < self.size:
+                        self._created += 1
+                        self._stats["created"] += 1
+                        create = True
+                    else:
+                        create = False
+                if create:
+                    try:
+                        return self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+
+                self._stats["waits"] += 1
+                try:
+                    conn, idle_since = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise RuntimeError("Timed out waiting for a database connection")
 
+            if time.monotonic() - idle_since > self.healthcheck_interval:
+                self._stats["healthchecks"] += 1
+                try:
+                    conn.execute("SELECT 1").fetchone()
+                except sqlite3.Error:
+                    self._discard(conn)
+                    continue
+
+            self._stats["reused"] += 1
+            return conn
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+
+        if broken:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._stats["discarded"] += 1
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                **self._stats,
+                "size": self.size,
+                "open": self._created,
+                "idle": idle,
+                "in_use": self._created - idle
+            }
+
+
+def get_pool(app=None):
+    """
+    Return the app's connection pool, creating it on first use in this
+    process (a pool inherited across fork is dropped, never shared).
+    """
+    app = app or current_app
+    pool = app.extensions.get("sqlite_pool")
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = app.extensions.get("sqlite_pool")
+            if pool is None or pool.pid != os.getpid():
+                cfg = app.config
+                pool = ConnectionPool(
+                    cfg["DB_PATH"],
+                    size=cfg.get("DB_POOL_SIZE", 4),
+                    timeout=cfg.get("DB_POOL_TIMEOUT", 10.0),
+                    cached_statements=cfg.get("DB_CACHED_STATEMENTS", 256),
+                    cache_size_kib=cfg.get("DB_CACHE_SIZE_KIB", 16384),
+                    mmap_size=cfg.get("DB_MMAP_SIZE", 268435456),
+                    temp_store=cfg.get("DB_TEMP_STORE", "MEMORY"),
+                    healthcheck_interval=cfg.get("DB_POOL_HEALTHCHECK_INTERVAL", 30.0)
+                )
+                app.extensions["sqlite_pool"] = pool
+    return pool
+
+
+def get_db_connection():
+    """
+    Return a sqlite3 connection (row factory = sqlite3.Row).
+    One pooled connection per request context.
+    """
+    conn = getattr(g, "_sqlite_conn", None)
+
+    if conn is None:
+        conn = get_pool().acquire()
+        conn.on_statement = get_sql_tracer(current_app).start()
         g._sqlite_conn = conn
 
     return conn
@@ -110,9 +424,91 @@ def get_db_connection():
 
 def close_db_connection(exception=None):
     """
-    Close database connection on app context teardown.
+    Return the request's connection to the pool on app context teardown.
+    Any transaction left open is rolled back.
     """
-    conn = getattr(g, "_sqlite_conn", None)
+    conn = g.pop("_sqlite_conn", None)
     if conn is not None:
+        # Queries with unread rows belong to this request's trace and
+        # counters, not to whichever request takes the connection next
+        conn.report_unread()
+        trace, conn.on_statement = conn.on_statement, None
+        if trace is not None:
+            trace.finish()
+        get_pool().release(conn)
+
+
+def benchmark(iterations=2000):
+    """
+    Per-request connection overhead: a fresh connection per request (as
+    before pooling) against a pooled one, alone and through GET /api/health.
+    Times are microseconds per iteration.
+    """
+    import tempfile
+
+    from . import create_app
+    from .config import Config
+
+    class BenchConfig(Config):
+        DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+        SESSION_SWEEP_INTERVAL = 0
+        METRICS_ENABLED = False
+
+    app = create_app(BenchConfig)
+    pool = get_pool(app)
+    client = app.test_client()
+
+    def unpooled():
+        conn = sqlite3.connect(
+            app.config["DB_PATH"],
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("SELECT 1").fetchone()
         conn.close()
 
+    def pooled():
+        conn = pool.acquire()
+        conn.execute("SELECT 1").fetchone()
+        pool.release(conn)
+
+    def health():
+        client.get("/api/health")
+
+    def timed(fn):
+        fn()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return round((time.perf_counter() - started) / iterations * 1e6, 1)
+
+    results = {
+        "iterations": iterations,
+        "connect_query_close_us": timed(unpooled),
+        "acquire_query_release_us": timed(pooled),
+        "health_pooled_us": timed(health),
+    }
+
+    # Discarding every released connection makes each request open (and
+    # configure) a new one, as it did before pooling
+    release = pool.release
+    pool.release = lambda conn, broken=False: release(conn, broken=True)
+    try:
+        results["health_unpooled_us"] = timed(health)
+    finally:
+        del pool.release
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark per-request connection overhead.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.iterations)))
@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
@@ -8,6 +8,10 @@ import os
 from backend.config import Config
 from backend.database import init_db, close_db_connection
 from backend.routes import register_routes
+from backend.utils.static_files import get_asset_manifest
+from backend.utils.session_sweeper import init_session_sweeper
+from backend.utils.response_encoding import init_response_encoding
+from backend.utils.metrics import init_metrics
 
 load_dotenv()
 
@@ -15,6 +19,12 @@ app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app, supports_credentials=True)
 
+# Request metrics (first, so response sizes are recorded as sent)
+init_metrics(app)
+
+# Fast JSON / MessagePack serialization and response compression
+init_response_encoding(app)
+
 # Initialize database
 init_db(app)
 
@@ -24,17 +34,11 @@ register_routes(app)
 # Teardown database connection
 app.teardown_appcontext(close_db_connection)
 
-@app.route('/uploads/<path:filename>')
-def uploaded_file(filename):
-    upload_dir = app.config.get('UPLOAD_FOLDER')
-    if not upload_dir:
-        abort(500, "UPLOAD_FOLDER not configured")
-
-    full_path = os.path.join(upload_dir, filename)
-    if not os.path.isfile(full_path):
-        abort(404)
+# Build the frontend asset manifest before serving
+get_asset_manifest(app)
 
-    return send_from_directory(upload_dir, filename)
+# Purge expired sessions in the background
+init_session_sweeper(app)
 
 if __name__ == '__main__':
     # Ensure database directory exists
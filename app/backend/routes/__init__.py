@@ -9,6 +9,13 @@ from .relationships_routes import relationships_bp
 from .events_routes import events_bp
 from .misc_routes import misc_bp
 from .user_routes import users_bp
+from .import_routes import import_bp
+from .export_routes import export_bp
+from .image_routes import images_bp
+from .map_routes import map_bp
+from .timeline_routes import timeline_bp
+from .batch_routes import batch_bp
+from .tree_routes import tree_bp
 
 
 __all__ = [
@@ -17,6 +24,13 @@ __all__ = [
     'people_bp',
     'relationships_bp',
     'events_bp',
+    'import_bp',
+    'export_bp',
+    'images_bp',
+    'map_bp',
+    'timeline_bp',
+    'batch_bp',
+    'tree_bp',
     'misc_bp',
     'register_routes'
 ]
@@ -34,6 +48,13 @@ def register_routes(app):
     app.register_blueprint(users_bp)
     app.register_blueprint(relationships_bp)
     app.register_blueprint(events_bp)
+    app.register_blueprint(import_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(images_bp)
+    app.register_blueprint(map_bp)
+    app.register_blueprint(timeline_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(tree_bp)
     
     # Register misc blueprint (includes health check and frontend serving)
     # This should be registered last as it includes catch-all routes
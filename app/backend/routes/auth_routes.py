@@ -1,11 +1,42 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime, timedelta
 import sqlite3
 from ..database import get_db_connection
-from ..auth_utils import hash_password, generate_session_token, require_auth
+from ..auth_utils import (
+    hash_password, verify_password, generate_session_token, require_auth,
+    get_bearer_token, get_session_cache
+)
+from ..utils.passwords import KdfBusy
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+
+def _enforce_session_cap(cursor, user_id, limit):
+    """Drop the user's oldest sessions beyond `limit` (newest are kept)."""
+    cursor.execute(
+        """
+        SELECT session_token FROM Sessions
+        WHERE user_id = ?
+        ORDER BY id DESC
+        LIMIT -1 OFFSET ?
+        """,
+        (user_id, limit)
+    )
+    evicted = [row[0] for row in cursor.fetchall()]
+    if not evicted:
+        return
+    cursor.executemany("DELETE FROM Sessions WHERE session_token = ?", [(t,) for t in evicted])
+    cache = get_session_cache()
+    for token in evicted:
+        cache.invalidate_token(token)
+
+
+def _kdf_busy(e):
+    response = jsonify({'success': False, 'error': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user."""
@@ -64,6 +95,9 @@ def register():
 
         return jsonify({'success': True, 'message': 'User registered successfully', 'user_id': int(user_id)}), 201
 
+    except KdfBusy as e:
+        return _kdf_busy(e)
+
     except sqlite3.IntegrityError:
         return jsonify({
             'success': False,
@@ -87,24 +121,31 @@ def login():
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        password_hash = hash_password(password)
-
         cursor.execute(
             """
-            SELECT id, username, email, full_name
+            SELECT id, username, email, full_name, password_hash
             FROM Users
-            WHERE username = ? AND password_hash = ? AND is_active = 1
+            WHERE username = ? AND is_active = 1
             """,
-            (username, password_hash)
+            (username,)
         )
         user_row = cursor.fetchone()
-        if not user_row:
+
+        # Unknown usernames still pay for a KDF run so they time the same
+        ok, new_hash = verify_password(password, user_row['password_hash'] if user_row else None)
+        if not ok:
             return jsonify({'success': False, 'error': 'Invalid username or password'}), 401
 
         user = dict(user_row)
+        if new_hash:
+            # Transparent upgrade of legacy / outdated-cost hashes
+            cursor.execute(
+                "UPDATE Users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (new_hash, user['id'], user['password_hash'])
+            )
         session_token = generate_session_token()
         now = datetime.now()
-        expires_at = now + timedelta(days=7)
+        expires_at = now + timedelta(days=current_app.config['SESSION_EXPIRY_DAYS'])
 
         cursor.execute(
             """
@@ -113,6 +154,7 @@ def login():
             """,
             (user['id'], session_token, now.isoformat(), expires_at.isoformat())
         )
+        _enforce_session_cap(cursor, user['id'], current_app.config['SESSION_MAX_PER_USER'])
         conn.commit()
 
         return jsonify({
@@ -127,6 +169,9 @@ def login():
             }
         }), 200
 
+    except KdfBusy as e:
+        return _kdf_busy(e)
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -135,14 +180,14 @@ def login():
 def logout():
     """Logout user and invalidate session."""
     try:
-        token_header = request.headers.get('Authorization', '')
-        token = token_header[7:] if token_header.startswith('Bearer ') else None
+        token = get_bearer_token()
 
         if token:
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM Sessions WHERE session_token = ?", (token,))
             conn.commit()
+            get_session_cache().invalidate_token(token)
 
         return jsonify({'success': True, 'message': 'Logout successful'}), 200
     except Exception as e:
@@ -194,12 +239,18 @@ def update_current_user():
         cursor.execute(sql, tuple(params))
         conn.commit()
 
+        # Cached sessions hold a copy of the profile; drop them so the next
+        # request re-reads the user (and any password change takes effect).
+        get_session_cache().invalidate_user(g.current_user['id'])
+
         cursor.execute("SELECT id, username, email, full_name FROM Users WHERE id = ?", (g.current_user['id'],))
         user_row = cursor.fetchone()
         user = dict(user_row) if user_row else None
 
         return jsonify({'success': True, 'user': user}), 200
 
+    except KdfBusy as e:
+        return _kdf_busy(e)
     except sqlite3.IntegrityError:
         return jsonify({'success': False, 'error': 'Email already in use'}), 400
     except Exception as e:
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify, current_app
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.batch import BatchError, parse_operations, run_batch
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+
+@batch_bp.route('', methods=['POST'])
+@require_auth
+def run_operations():
+    """
+    Run an ordered list of people / relationships / events calls in one
+    transaction:
+
+        {"operations": [
+            {"method": "POST", "path": "/api/people", "ref": "dad",
+             "body": {"given_name": "Ravi", "family_name": "Rao"}},
+            {"method": "POST", "path": "/api/relationships",
+             "body": {"person1_id": "$dad", "person2_id": 12, "type": "father"}}
+        ]}
+
+    Every operation's status and body are returned in `results`. If one
+    fails, nothing is committed and `failed_index` names it.
+    """
+    try:
+        operations = parse_operations(
+            request.get_json(silent=True),
+            current_app.config['BATCH_MAX_OPERATIONS']
+        )
+    except BatchError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+    results, ids, failed_index = run_batch(get_db_connection(), operations)
+
+    if failed_index is not None:
+        failed = results[failed_index]
+        error = (failed['body'] or {}).get('error') or 'Operation failed'
+        return jsonify({
+            'success': False,
+            'error': f'Operation {failed_index} failed: {error}',
+            'failed_index': failed_index,
+            'results': results
+        }), failed['status']
+
+    return jsonify({'success': True, 'results': results, 'ids': ids}), 200
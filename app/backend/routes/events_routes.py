@@ -1,39 +1,98 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
 from ..database import get_db_connection
 from ..auth_utils import require_auth
+from ..utils.data_version import bump_data_version, conditional_get
+from ..utils.dates import parse_date_range, parse_window
+from ..utils.digipin import fill_location
+from ..utils.fields import FieldsError, parse_fields, select_list, project
+from ..utils.pagination import PaginationError, get_page_args, page_response
 
 events_bp = Blueprint('events', __name__, url_prefix='/api/events')
 
+# Fields readable through ?fields= (utils/fields); the People join is
+# only made when person_name is asked for
+EVENT_FIELDS = {
+    'id': 'e.id',
+    'title': 'e.title',
+    'event_date': 'e.event_date',
+    'event_jd_lo': 'e.event_jd_lo',
+    'event_jd_hi': 'e.event_jd_hi',
+    'place': 'e.place',
+    'place_lat': 'e.place_lat',
+    'place_lng': 'e.place_lng',
+    'place_digipin': 'e.place_digipin',
+    'description': 'e.description',
+    'created_by': 'e.created_by',
+    'person_name': "p.given_name || ' ' || p.family_name",
+}
+
 
 @events_bp.route('', methods=['GET'])
 @require_auth
+@conditional_get
 def list_events():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT
-            e.id,
-            e.title,
-            e.event_date,
-            e.place,
-            e.place_lat,
-            e.place_lng,
-            e.place_digipin,
-            e.description,
-            e.created_by,
-            p.given_name || ' ' || p.family_name AS person_name
+    try:
+        page = get_page_args(
+            request.args, 2,
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        jd_from, jd_to = parse_window(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # Newest first by normalized date; undated (or unparseable) events sort
+    # last as -1, which is the key of idx_events_user_jd
+    sql = f"""
+        SELECT {select_list(EVENT_FIELDS, fields, ('event_jd_lo',))}
         FROM Events e
         LEFT JOIN People p ON e.created_by = p.id
         WHERE e.user_id = ?
-        ORDER BY e.event_date IS NULL, e.event_date DESC, e.id DESC
-    """, (g.current_user['id'],))
+    """
+    params = [g.current_user['id']]
+    if jd_from is not None:
+        sql += " AND IFNULL(e.event_jd_lo, -1) >= ?"
+        params.append(jd_from)
+    if jd_to is not None:
+        sql += " AND IFNULL(e.event_jd_lo, -1) <= ?"
+        params.append(jd_to)
+    order = " ORDER BY IFNULL(e.event_jd_lo, -1) DESC, e.id DESC"
+
+    if page is None:
+        sql += order
+    else:
+        limit, before = page
+        if before:
+            sql += """
+              AND IFNULL(e.event_jd_lo, -1) <= ?
+              AND (IFNULL(e.event_jd_lo, -1), e.id) < (?, ?)
+            """
+            params += [before[0], *before]
+        sql += order + " LIMIT ?"
+        params.append(limit + 1)
 
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(sql, params)
     rows = cur.fetchall()
-    data = [dict(row) for row in rows]
 
-    return jsonify({'success': True, 'data': data}), 200
+    if page is None:
+        return jsonify({'success': True, 'data': project([dict(row) for row in rows], fields)}), 200
+
+    data, next_cursor = page_response(
+        rows, limit, lambda r: (r['event_jd_lo'] if r['event_jd_lo'] is not None else -1, r['id'])
+    )
+    return jsonify({'success': True, 'data': project(data, fields), 'next_cursor': next_cursor}), 200
 
 
 @events_bp.route('', methods=['POST'])
@@ -47,6 +106,13 @@ def create_event():
     if not person_id or not title:
         return jsonify({'success': False, 'error': 'Person and title are required'}), 400
 
+    try:
+        place_lat, place_lng, place_digipin = fill_location(
+            data.get('place_lat'), data.get('place_lng'), data.get('place_digipin')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid place location: {e}'}), 400
+
     now = datetime.now().isoformat()
 
     conn = get_db_connection()
@@ -56,6 +122,8 @@ def create_event():
         INSERT INTO Events (
             title,
             event_date,
+            event_jd_lo,
+            event_jd_hi,
             place,
             place_lat,
             place_lng,
@@ -66,14 +134,15 @@ def create_event():
             created_at,
             updated_at
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         title,
         data.get('event_date'),
+        *parse_date_range(data.get('event_date')),
         data.get('place'),
-        data.get('place_lat'),
-        data.get('place_lng'),
-        data.get('place_digipin'),
+        place_lat,
+        place_lng,
+        place_digipin,
         data.get('description'),
         person_id,
         g.current_user['id'],
@@ -81,6 +150,7 @@ def create_event():
         now
     ))
 
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     return jsonify({'success': True, 'id': cur.lastrowid}), 201
@@ -88,22 +158,18 @@ def create_event():
 
 @events_bp.route('/<int:event_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_event(event_id):
+    try:
+        fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT
-            e.id,
-            e.title,
-            e.event_date,
-            e.place,
-            e.place_lat,
-            e.place_lng,
-            e.place_digipin,
-            e.description,
-            e.created_by,
-            p.given_name || ' ' || p.family_name AS person_name
+    cur.execute(f"""
+        SELECT {select_list(EVENT_FIELDS, fields)}
         FROM Events e
         LEFT JOIN People p ON e.created_by = p.id
         WHERE e.id = ? AND e.user_id = ?
@@ -128,6 +194,13 @@ def update_event(event_id):
     if not person_id or not title:
         return jsonify({'success': False, 'error': 'Person and title are required'}), 400
 
+    try:
+        place_lat, place_lng, place_digipin = fill_location(
+            data.get('place_lat'), data.get('place_lng'), data.get('place_digipin')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid place location: {e}'}), 400
+
     now = datetime.now().isoformat()
 
     conn = get_db_connection()
@@ -137,6 +210,8 @@ def update_event(event_id):
         UPDATE Events SET
             title = ?,
             event_date = ?,
+            event_jd_lo = ?,
+            event_jd_hi = ?,
             place = ?,
             place_lat = ?,
             place_lng = ?,
@@ -148,10 +223,11 @@ def update_event(event_id):
     """, (
         title,
         data.get('event_date'),
+        *parse_date_range(data.get('event_date')),
         data.get('place'),
-        data.get('place_lat'),
-        data.get('place_lng'),
-        data.get('place_digipin'),
+        place_lat,
+        place_lng,
+        place_digipin,
         data.get('description'),
         person_id,
         now,
@@ -159,6 +235,7 @@ def update_event(event_id):
         g.current_user['id']
     ))
 
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     if cur.rowcount == 0:
@@ -178,6 +255,7 @@ def delete_event(event_id):
         WHERE id = ? AND user_id = ?
     """, (event_id, g.current_user['id']))
 
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     if cur.rowcount == 0:
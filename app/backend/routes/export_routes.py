@@ -0,0 +1,51 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify, g, current_app, Response, stream_with_context
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.tree_export import export_ndjson, export_gedcom
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/export')
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'gedcom': ('text/vnd.familysearch.gedcom; charset=utf-8', 'ged'),
+}
+
+
+@export_bp.route('', methods=['GET'])
+@require_auth
+def export_tree():
+    """
+    Stream the current user's whole tree as ?format=ndjson (default) or
+    ?format=gedcom, read from a single transaction in fixed-size batches.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': 'format must be one of: ' + ', '.join(EXPORT_FORMATS)}), 400
+
+    user_id = g.current_user['id']
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    parent_types = current_app.config['PARENT_RELATION_TYPES']
+    spouse_types = current_app.config['SPOUSE_RELATION_TYPES']
+
+    def generate():
+        # Runs after the view returns, so take the connection here
+        conn = get_db_connection()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN")
+        try:
+            if fmt == 'gedcom':
+                yield from export_gedcom(conn, user_id, parent_types, spouse_types, batch_size)
+            else:
+                yield from export_ndjson(conn, user_id, batch_size)
+        finally:
+            conn.rollback()
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"familytree-{datetime.now().strftime('%Y%m%d')}.{extension}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
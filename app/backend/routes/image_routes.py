@@ -0,0 +1,45 @@
+from flask import Blueprint, request, jsonify, current_app, send_file
+from ..utils.image_store import DIGEST_RE, get_image_store
+
+images_bp = Blueprint('images', __name__, url_prefix='/api/images')
+
+
+@images_bp.route('/<digest>', methods=['GET'])
+def serve_image(digest):
+    """
+    Serve a stored image variant. ?size= picks the smallest stored
+    variant at least that large (default 256); WebP is sent when the
+    client's Accept header allows it, JPEG otherwise. Content is
+    addressed by hash, so responses are cacheable forever.
+    """
+    if not DIGEST_RE.match(digest):
+        return jsonify({'success': False, 'error': 'Image not found'}), 404
+
+    try:
+        requested = int(request.args.get('size', 256))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'size must be an integer'}), 400
+
+    store = get_image_store(current_app)
+    size = store.pick_size(requested)
+
+    accept = request.accept_mimetypes
+    variant = None
+    if accept['image/webp'] and accept['image/webp'] >= accept['image/jpeg']:
+        variant = store.variant(digest, size, 'webp')
+    variant = variant or store.variant(digest, size, 'jpeg')
+    if variant is None:
+        return jsonify({'success': False, 'error': 'Image not found'}), 404
+
+    path, mimetype = variant
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        etag=f'{digest}-{size}-{mimetype.split("/")[1]}',
+        max_age=31536000,
+        conditional=True
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
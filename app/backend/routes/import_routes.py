@@ -0,0 +1,59 @@
+import json
+from flask import Blueprint, request, jsonify, g, current_app, Response, stream_with_context
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.gedcom_import import GedcomImporter
+
+import_bp = Blueprint('import', __name__, url_prefix='/api/import')
+
+
+@import_bp.route('/gedcom', methods=['POST'])
+@require_auth
+def import_gedcom():
+    """
+    Import a GEDCOM file, sent either as the multipart field `file` or as
+    the raw request body. The body is parsed as it is read; batches already
+    committed are kept if a later batch fails.
+
+    With ?progress=1 (raw body only) the response is NDJSON: one progress
+    line per committed batch and a final line with done=true. Otherwise a
+    single JSON summary is returned once the import finishes.
+    """
+    user_id = g.current_user['id']
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    progress = request.args.get('progress', '').lower() in ('1', 'true', 'yes')
+
+    if request.mimetype == 'multipart/form-data':
+        if progress:
+            return jsonify({
+                'success': False,
+                'error': 'Send the file as the raw request body to stream progress'
+            }), 400
+        file = request.files.get('file')
+        if not file:
+            return jsonify({'success': False, 'error': 'No file provided'}), 400
+        stream = file.stream
+    else:
+        stream = request.stream
+
+    if progress:
+        def generate():
+            # Runs after the view returns, so take the connection here
+            importer = GedcomImporter(get_db_connection(), user_id, batch_size)
+            try:
+                for step in importer.run(stream):
+                    yield json.dumps({'success': True, **step}) + '\n'
+            except Exception as e:
+                current_app.logger.exception("GEDCOM import failed")
+                yield json.dumps({'success': False, 'error': str(e), **importer.progress()}) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    importer = GedcomImporter(get_db_connection(), user_id, batch_size)
+    try:
+        for step in importer.run(stream):
+            current_app.logger.debug("GEDCOM import progress: %s", step)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e), **importer.progress()}), 500
+
+    return jsonify({'success': True, **importer.progress(done=True)}), 200
@@ -0,0 +1,165 @@
+from flask import Blueprint, request, jsonify, g, current_app
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.data_version import conditional_get, get_data_version
+from ..utils.geo import (
+    parse_bbox, parse_kinds, split_antimeridian, query_boxes, nearest,
+    rows_in_cell, count_cells
+)
+from ..utils import digipin
+from ..utils.map_clusters import tiles_for_bbox, get_cluster_cache, clusters_for_bbox
+
+map_bp = Blueprint('map', __name__, url_prefix='/api/map')
+
+
+@map_bp.route('/points', methods=['GET'])
+@require_auth
+@conditional_get
+def points_in_viewport():
+    """
+    People (birth point) and events (place) inside
+    ?bbox=west,south,east,north, optionally limited to ?types=people,events.
+    At most ?limit= rows per type; `truncated` says whether more exist.
+    """
+    try:
+        bbox = parse_bbox(request.args.get('bbox'))
+        kinds = parse_kinds(request.args.get('types'))
+        limit = int(request.args.get('limit', current_app.config['MAP_POINTS_LIMIT']))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if limit < 1 or limit > current_app.config['MAP_POINTS_LIMIT']:
+        return jsonify({'success': False, 'error': f"limit must be between 1 and {current_app.config['MAP_POINTS_LIMIT']}"}), 400
+
+    conn = get_db_connection()
+    boxes = split_antimeridian(bbox)
+    data = {}
+    truncated = False
+    for kind in kinds:
+        rows = query_boxes(conn, g.current_user['id'], kind, boxes, limit + 1)
+        truncated = truncated or len(rows) > limit
+        data[kind] = rows[:limit]
+
+    return jsonify({'success': True, 'data': data, 'truncated': truncated}), 200
+
+
+@map_bp.route('/clusters', methods=['GET'])
+@require_auth
+@conditional_get
+def clusters():
+    """
+    Points in ?bbox=west,south,east,north aggregated into grid cells for
+    map ?zoom=. Each cluster has its centroid, total and per-type
+    counts, and a few representative ids per type.
+    """
+    cfg = current_app.config
+    try:
+        bbox = parse_bbox(request.args.get('bbox'))
+        zoom = int(request.args['zoom'])
+        kinds = parse_kinds(request.args.get('types'))
+    except KeyError:
+        return jsonify({'success': False, 'error': 'zoom is required'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not 0 <= zoom <= cfg['MAP_MAX_ZOOM']:
+        return jsonify({'success': False, 'error': f"zoom must be between 0 and {cfg['MAP_MAX_ZOOM']}"}), 400
+    if len(tiles_for_bbox(bbox, zoom)) > cfg['MAP_CLUSTER_MAX_TILES']:
+        return jsonify({'success': False, 'error': 'bbox is too large for this zoom'}), 400
+
+    user_id = g.current_user['id']
+    conn = get_db_connection()
+    result = clusters_for_bbox(
+        conn, get_cluster_cache(current_app), user_id, get_data_version(conn, user_id),
+        kinds, bbox, zoom, cfg['MAP_CLUSTER_CELLS_PER_TILE'], cfg['MAP_CLUSTER_REPRESENTATIVES']
+    )
+    return jsonify({'success': True, 'zoom': zoom, 'clusters': result}), 200
+
+
+@map_bp.route('/nearest', methods=['GET'])
+@require_auth
+@conditional_get
+def nearest_points():
+    """The ?k= nearest people / events to ?lat=&lng=, with distance_km."""
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        k = int(request.args.get('k', 10))
+        kinds = parse_kinds(request.args.get('types'))
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'error': 'lat, lng (and optional integer k) are required'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'success': False, 'error': 'lat/lng out of range'}), 400
+    max_k = current_app.config['MAP_NEAREST_MAX_K']
+    if k < 1 or k > max_k:
+        return jsonify({'success': False, 'error': f'k must be between 1 and {max_k}'}), 400
+
+    conn = get_db_connection()
+    data = {
+        kind: nearest(conn, g.current_user['id'], kind, lat, lng, k)
+        for kind in kinds
+    }
+    return jsonify({'success': True, 'data': data}), 200
+
+
+@map_bp.route('/digipin/<code>', methods=['GET'])
+@require_auth
+@conditional_get
+def points_in_digipin_cell(code):
+    """People / events whose DIGIPIN lies in the cell `code` (any prefix length)."""
+    try:
+        prefix = digipin.normalize(code)
+        kinds = parse_kinds(request.args.get('types'))
+        limit = int(request.args.get('limit', current_app.config['MAP_POINTS_LIMIT']))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if limit < 1 or limit > current_app.config['MAP_POINTS_LIMIT']:
+        return jsonify({'success': False, 'error': f"limit must be between 1 and {current_app.config['MAP_POINTS_LIMIT']}"}), 400
+
+    conn = get_db_connection()
+    data = {}
+    truncated = False
+    for kind in kinds:
+        rows = rows_in_cell(conn, g.current_user['id'], kind, prefix, limit + 1)
+        truncated = truncated or len(rows) > limit
+        data[kind] = rows[:limit]
+
+    south, west, north, east = digipin.decode_bounds(prefix)
+    return jsonify({
+        'success': True,
+        'cell': prefix,
+        'bounds': {'south': south, 'west': west, 'north': north, 'east': east},
+        'data': data,
+        'truncated': truncated
+    }), 200
+
+
+@map_bp.route('/digipin-cells', methods=['GET'])
+@require_auth
+@conditional_get
+def digipin_cells():
+    """
+    Counts grouped by DIGIPIN cell at ?precision= symbols (1-10),
+    optionally within the cell ?prefix=. Each cell carries its centre.
+    """
+    try:
+        precision = int(request.args.get('precision', 4))
+        prefix = digipin.normalize(request.args['prefix']) if request.args.get('prefix') else ''
+        kinds = parse_kinds(request.args.get('types'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not (len(prefix.replace('-', '')) <= precision <= digipin.LEVELS) or precision < 1:
+        return jsonify({'success': False, 'error': f'precision must be between the prefix length and {digipin.LEVELS}'}), 400
+
+    conn = get_db_connection()
+    length = digipin.prefix_length(precision)
+    data = {}
+    for kind in kinds:
+        cells = []
+        for cell, count in count_cells(conn, g.current_user['id'], kind, length, prefix):
+            try:
+                lat, lng = digipin.decode(cell)
+            except ValueError:
+                continue    # stored code with symbols outside the grid
+            cells.append({'cell': cell, 'count': count, 'lat': lat, 'lng': lng})
+        data[kind] = cells
+
+    return jsonify({'success': True, 'precision': precision, 'data': data}), 200
@@ -1,9 +1,28 @@
-from flask import Blueprint, jsonify, send_from_directory, current_app
-from ..database import get_db_connection
-import os
+import hmac
+from flask import Blueprint, Response, jsonify, current_app, abort
+from ..database import get_db_connection, get_pool
+from ..auth_utils import get_session_cache, get_bearer_token
+from ..utils.passwords import get_password_hasher
+from ..utils.session_sweeper import get_session_sweeper
+from ..utils.map_clusters import get_cluster_cache
+from ..utils.metrics import get_metrics
+from ..utils.sql_trace import get_sql_tracer
+from ..utils.static_files import get_asset_manifest, serve_asset, serve_upload
 
 misc_bp = Blueprint('misc', __name__)
 
+
+def _component_stats():
+    sweeper = get_session_sweeper(current_app)
+    return {
+        'session_cache': get_session_cache().stats(),
+        'db_pool': get_pool().stats(),
+        'password_kdf': get_password_hasher().stats(),
+        'session_sweeper': sweeper.stats() if sweeper else None,
+        'map_cluster_cache': get_cluster_cache(current_app).stats(),
+        'sql_tracer': get_sql_tracer(current_app).stats()
+    }
+
 @misc_bp.route('/api/health', methods=['GET'])
 def health_check():
     """API health check endpoint."""
@@ -16,7 +35,8 @@ def health_check():
             'success': True,
             'message': 'API is running',
             'database': 'connected',
-            'db_path': current_app.config['DB_PATH']
+            'db_path': current_app.config['DB_PATH'],
+            **_component_stats()
         }), 200
     except Exception as e:
         return jsonify({
@@ -27,11 +47,45 @@ def health_check():
             'db_path': current_app.config['DB_PATH']
         }), 500
 
+@misc_bp.route('/api/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics for this process. If METRICS_TOKEN is set the
+    scraper must send it as a bearer token.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(get_bearer_token() or '', token):
+        return jsonify({'success': False, 'error': 'Authentication required'}), 401
+
+    body = get_metrics(current_app).render(_component_stats())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@misc_bp.route('/uploads/<path:filename>')
+def uploaded_file(filename):
+    """Serve a file from UPLOAD_FOLDER."""
+    upload_dir = current_app.config.get('UPLOAD_FOLDER')
+    if not upload_dir:
+        abort(500, "UPLOAD_FOLDER not configured")
+
+    response = serve_upload(
+        upload_dir, filename,
+        current_app.config['UPLOADS_MAX_AGE'],
+        current_app.config['UPLOADS_ACCEL_PREFIX']
+    )
+    if response is None:
+        abort(404)
+    return response
+
 @misc_bp.route('/', defaults={'path': ''})
 @misc_bp.route('/<path:path>')
 def serve_frontend(path):
-    """Serve the compiled frontend files (SPA)."""
-    FRONTEND_DIR = os.path.join(os.getcwd(), 'frontend')
-    if path != "" and os.path.exists(os.path.join(FRONTEND_DIR, path)):
-        return send_from_directory(FRONTEND_DIR, path)
-    return send_from_directory(FRONTEND_DIR, 'index.html')
+    """Serve the compiled frontend files (SPA) from the startup manifest."""
+    manifest = get_asset_manifest(current_app)
+    asset = (path and manifest.get(path)) or manifest.get('index.html')
+    if asset is None:
+        abort(404)
+    return serve_asset(
+        manifest, asset,
+        current_app.config['STATIC_MAX_AGE'],
+        current_app.config['STATIC_ACCEL_PREFIX']
+    )
@@ -1,94 +1,225 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
-import os
-from PIL import Image, UnidentifiedImageError
 
 from ..database import get_db_connection
 from ..auth_utils import require_auth
+from ..utils.data_version import bump_data_version, conditional_get
+from ..utils.lineage import fetch_lineage
+from ..utils.kinship import build_adjacency, shortest_path, describe
+from ..utils.dates import parse_date_range
+from ..utils.digipin import fill_location
+from ..utils.fields import FieldsError, parse_fields, select_list, project
+from ..utils.pagination import PaginationError, get_page_args, page_response
+from ..utils.search import build_match_query, PEOPLE_FTS_WEIGHTS
+from ..utils.photo_jobs import get_photo_processor, create_job, set_job_status
+from ..utils.image_store import get_image_store, image_digest, image_url
+from ..utils.uploads import read_image_upload, UploadError
 
 people_bp = Blueprint('people', __name__, url_prefix='/api/people')
 
+# Fields readable through ?fields= (utils/fields); id, given_name and
+# family_name alone are answered from idx_people_user_names
+PERSON_FIELDS = {
+    name: name for name in (
+        'id', 'given_name', 'family_name', 'photo', 'other_names', 'gender',
+        'birth_date', 'death_date',
+        'birth_place', 'birth_lat', 'birth_lng', 'birth_digipin',
+        'bio', 'relation',
+        'created_at', 'updated_at'
+    )
+}
 
-def save_resized_image(file, path, size=(256, 256), quality=75):
-    try:
-        img = Image.open(file)
-    except UnidentifiedImageError:
-        raise ValueError("Uploaded file is not a valid image")
-
-    if img.mode in ("RGBA", "LA"):
-        background = Image.new("RGB", img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[-1])
-        img = background
-    else:
-        img = img.convert("RGB")
 
-    img.thumbnail(size)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    img.save(path, format="JPEG", quality=quality, optimize=True)
+def _process_person_photo(conn, job_id, person_id, user_id, data, digest):
+    """Photo job body: build the image variants and point People.photo at them."""
+    get_image_store(current_app).put(data, digest)
+    _set_person_photo(conn, person_id, user_id, image_url(digest))
+    set_job_status(conn, job_id, 'done', photo=image_url(digest))
+
+
+def _set_person_photo(conn, person_id, user_id, photo):
+    conn.execute("""
+        UPDATE People
+        SET photo = ?, updated_at = ?
+        WHERE id = ? AND user_id = ?
+    """, (photo, datetime.now().isoformat(), person_id, user_id))
+    bump_data_version(conn, user_id)
+    conn.commit()
 
 
 @people_bp.route('/<int:person_id>/photo', methods=['POST'])
 @require_auth
 def upload_person_photo(person_id):
-    file = request.files.get('photo')
-    if not file:
-        return jsonify({'success': False, 'error': 'No file provided'}), 400
+    """
+    Accept a photo for a person. Images already in the store are linked
+    immediately (200); new ones are processed in the background (202 with
+    a job id to poll at /api/people/photo-jobs/<job_id>).
+    """
+    try:
+        data = read_image_upload(request.files.get('photo'), current_app.config['PHOTO_MAX_BYTES'])
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+    user_id = g.current_user['id']
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id FROM People WHERE id = ? AND user_id = ? AND is_deleted = 0",
+        (person_id, user_id)
+    )
+    if not cur.fetchone():
+        return jsonify({'success': False, 'error': 'Person not found'}), 404
 
-    base_upload_dir = "/app/uploads/people"
-    filename = "photo.jpg"
-    full_path = os.path.join(base_upload_dir, str(person_id), filename)
+    digest = image_digest(data)
+    if get_image_store(current_app).exists(digest):
+        _set_person_photo(conn, person_id, user_id, image_url(digest))
+        return jsonify({'success': True, 'status': 'done', 'photo': image_url(digest)}), 200
+
+    processor = get_photo_processor()
+    if not processor.try_reserve():
+        response = jsonify({'success': False, 'error': 'Photo processing is busy, try again shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
 
     try:
-        save_resized_image(file, full_path)
-    except ValueError as e:
-        return jsonify({'success': False, 'error': str(e)}), 400
+        job_id = create_job(conn, person_id, user_id)
+        processor.submit(
+            current_app._get_current_object(), job_id, _process_person_photo,
+            person_id, user_id, data, digest
+        )
+    except Exception:
+        processor.cancel_reservation()
+        raise
 
-    db_path = f"uploads/people/{person_id}/{filename}"
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'pending'}), 202
 
+
+@people_bp.route('/photo-jobs/<int:job_id>', methods=['GET'])
+@require_auth
+def get_photo_job(job_id):
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute("""
-        UPDATE People
-        SET photo = ?, updated_at = ?
+        SELECT id, person_id, status, photo, error, created_at, updated_at
+        FROM PhotoJobs
         WHERE id = ? AND user_id = ?
-    """, (db_path, datetime.now().isoformat(), person_id, g.current_user['id']))
-    conn.commit()
+    """, (job_id, g.current_user['id']))
+    row = cur.fetchone()
 
-    return jsonify({'success': True, 'photo': db_path}), 200
+    if not row:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    return jsonify({'success': True, 'data': dict(row)}), 200
 
 
 @people_bp.route('', methods=['GET'])
 @require_auth
+@conditional_get
 def get_all_people():
+    try:
+        page = get_page_args(
+            request.args, 3,
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        fields = parse_fields(request.args.get('fields'), PERSON_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    sql = f"""
+        SELECT {select_list(PERSON_FIELDS, fields, ('family_name', 'given_name'))}
+        FROM People
+        WHERE is_deleted = 0 AND user_id = ?
+    """
+    params = [g.current_user['id']]
+
+    if page is None:
+        sql += " ORDER BY family_name, given_name, id"
+    else:
+        limit, after = page
+        if after:
+            sql += " AND (family_name, given_name, id) > (?, ?, ?)"
+            params += after
+        sql += " ORDER BY family_name, given_name, id LIMIT ?"
+        params.append(limit + 1)
+
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("""
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+
+    if page is None:
+        return jsonify({'success': True, 'data': project([dict(r) for r in rows], fields)}), 200
+
+    data, next_cursor = page_response(
+        rows, limit, lambda r: (r['family_name'], r['given_name'], r['id'])
+    )
+    return jsonify({'success': True, 'data': project(data, fields), 'next_cursor': next_cursor}), 200
+
+
+@people_bp.route('/search', methods=['GET'])
+@require_auth
+@conditional_get
+def search_people():
+    """Full-text search over names, places and bio, best matches first."""
+    match = build_match_query(request.args.get('q', ''))
+    if not match:
+        return jsonify({'success': False, 'error': 'Search query is required'}), 400
+
+    try:
+        limit, after = get_page_args(
+            request.args, 2,
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        ) or (current_app.config['DEFAULT_PAGE_SIZE'], None)
+    except PaginationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    weights = ', '.join(str(w) for w in PEOPLE_FTS_WEIGHTS)
+    sql = f"""
         SELECT
-            id, given_name, family_name, photo, other_names, gender,
-            birth_date, death_date,
-            birth_place, birth_lat, birth_lng, birth_digipin,
-            bio, relation,
-            created_at, updated_at
-        FROM People
-        WHERE is_deleted = 0 AND user_id = ?
-        ORDER BY family_name, given_name
-    """, (g.current_user['id'],))
+            p.id, p.given_name, p.family_name, p.photo, p.other_names, p.gender,
+            p.birth_date, p.death_date, p.birth_place,
+            bm25(People_fts, {weights}) AS score
+        FROM People_fts
+        JOIN People p ON p.id = People_fts.rowid
+        WHERE People_fts MATCH ?
+          AND p.user_id = ?
+          AND p.is_deleted = 0
+    """
+    params = [match, g.current_user['id']]
+    if after:
+        sql += f" AND (bm25(People_fts, {weights}), p.id) > (?, ?)"
+        params += after
+    sql += " ORDER BY score, p.id LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(sql, params)
     rows = cur.fetchall()
-    return jsonify({'success': True, 'data': [dict(r) for r in rows]}), 200
+
+    data, next_cursor = page_response(rows, limit, lambda r: (r['score'], r['id']))
+    return jsonify({'success': True, 'data': data, 'next_cursor': next_cursor}), 200
 
 
 @people_bp.route('/<int:person_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_person(person_id):
+    try:
+        fields = parse_fields(request.args.get('fields'), PERSON_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("""
-        SELECT
-            id, given_name, family_name, photo, other_names, gender,
-            birth_date, death_date,
-            birth_place, birth_lat, birth_lng, birth_digipin,
-            bio, relation,
-            created_at, updated_at
+    cur.execute(f"""
+        SELECT {select_list(PERSON_FIELDS, fields)}
         FROM People
         WHERE id = ? AND is_deleted = 0 AND user_id = ?
     """, (person_id, g.current_user['id']))
@@ -100,6 +231,123 @@ def get_person(person_id):
     return jsonify({'success': True, 'data': dict(row)}), 200
 
 
+def _lineage_response(person_id, direction):
+    user_id = g.current_user['id']
+    max_depth = current_app.config['MAX_LINEAGE_DEPTH']
+
+    try:
+        depth = int(request.args.get('depth', 10))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'depth must be an integer'}), 400
+    if depth < 1 or depth > max_depth:
+        return jsonify({'success': False, 'error': f'depth must be between 1 and {max_depth}'}), 400
+
+    include_spouses = request.args.get('include_spouses', '').lower() in ('1', 'true', 'yes')
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id FROM People WHERE id = ? AND user_id = ? AND is_deleted = 0",
+        (person_id, user_id)
+    )
+    if not cur.fetchone():
+        return jsonify({'success': False, 'error': 'Person not found'}), 404
+
+    rows = fetch_lineage(
+        conn, person_id, user_id, depth,
+        current_app.config['PARENT_RELATION_TYPES'],
+        current_app.config['SPOUSE_RELATION_TYPES'] if include_spouses else None,
+        direction=direction
+    )
+
+    return jsonify({
+        'success': True,
+        'person_id': person_id,
+        'depth': depth,
+        'data': [dict(r) for r in rows]
+    }), 200
+
+
+@people_bp.route('/<int:person_id>/ancestors', methods=['GET'])
+@require_auth
+@conditional_get
+def get_ancestors(person_id):
+    """Ancestors of a person up to `depth` generations (1 = parents)."""
+    return _lineage_response(person_id, 'ancestors')
+
+
+@people_bp.route('/<int:person_id>/descendants', methods=['GET'])
+@require_auth
+@conditional_get
+def get_descendants(person_id):
+    """Descendants of a person up to `depth` generations (1 = children)."""
+    return _lineage_response(person_id, 'descendants')
+
+
+@people_bp.route('/<int:person_id>/relation-to/<int:other_id>', methods=['GET'])
+@require_auth
+@conditional_get
+def get_relation(person_id, other_id):
+    """Describe how `person_id` is related to `other_id`."""
+    user_id = g.current_user['id']
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, given_name, family_name, gender
+        FROM People
+        WHERE id IN (?, ?) AND user_id = ? AND is_deleted = 0
+        """,
+        (person_id, other_id, user_id)
+    )
+    people = {r['id']: dict(r) for r in cur.fetchall()}
+    if person_id not in people or other_id not in people:
+        return jsonify({'success': False, 'error': 'Person not found'}), 404
+
+    adj = build_adjacency(
+        conn, user_id,
+        current_app.config['PARENT_RELATION_TYPES'],
+        current_app.config['SPOUSE_RELATION_TYPES'],
+        current_app.config['SIBLING_RELATION_TYPES']
+    )
+    # Walk from the reference person so the moves describe person_id
+    path = shortest_path(adj, other_id, person_id)
+
+    if path is None:
+        return jsonify({
+            'success': True,
+            'person_id': person_id,
+            'relative_of': other_id,
+            'related': False,
+            'label': None,
+            'path': []
+        }), 200
+
+    ids = [node for node, _ in path]
+    cur.execute(
+        f"""
+        SELECT id, given_name || ' ' || family_name AS name
+        FROM People
+        WHERE id IN ({', '.join('?' for _ in ids)})
+        """,
+        ids
+    )
+    names = {r['id']: r['name'] for r in cur.fetchall()}
+
+    return jsonify({
+        'success': True,
+        'person_id': person_id,
+        'relative_of': other_id,
+        'related': True,
+        'label': describe([move for _, move in path[1:]], people[person_id]['gender']),
+        'distance': len(path) - 1,
+        'path': [
+            {'id': node, 'name': names.get(node), 'step': move}
+            for node, move in path
+        ]
+    }), 200
+
+
 @people_bp.route('', methods=['POST'])
 @require_auth
 def create_person():
@@ -108,6 +356,13 @@ def create_person():
     if not data.get('given_name') or not data.get('family_name'):
         return jsonify({'success': False, 'error': 'Given name and family name are required'}), 400
 
+    try:
+        birth_lat, birth_lng, birth_digipin = fill_location(
+            data.get('birth_lat'), data.get('birth_lng'), data.get('birth_digipin')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid birth location: {e}'}), 400
+
     now = datetime.now().isoformat()
 
     conn = get_db_connection()
@@ -116,11 +371,12 @@ def create_person():
         INSERT INTO People (
             given_name, family_name, other_names, gender,
             birth_date, death_date,
+            birth_jd_lo, birth_jd_hi, death_jd_lo, death_jd_hi,
             birth_place, birth_lat, birth_lng, birth_digipin,
             bio, relation,
             created_at, updated_at, is_deleted, user_id
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
     """, (
         data.get('given_name'),
         data.get('family_name'),
@@ -128,16 +384,19 @@ def create_person():
         data.get('gender'),
         data.get('birth_date'),
         data.get('death_date'),
+        *parse_date_range(data.get('birth_date')),
+        *parse_date_range(data.get('death_date')),
         data.get('birth_place'),
-        data.get('birth_lat'),
-        data.get('birth_lng'),
-        data.get('birth_digipin'),
+        birth_lat,
+        birth_lng,
+        birth_digipin,
         data.get('bio'),
         data.get('relation'),
         now,
         now,
         g.current_user['id']
     ))
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     return jsonify({'success': True, 'id': cur.lastrowid}), 201
@@ -147,6 +406,14 @@ def create_person():
 @require_auth
 def update_person(person_id):
     data = request.get_json() or {}
+
+    try:
+        birth_lat, birth_lng, birth_digipin = fill_location(
+            data.get('birth_lat'), data.get('birth_lng'), data.get('birth_digipin')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid birth location: {e}'}), 400
+
     now = datetime.now().isoformat()
 
     conn = get_db_connection()
@@ -159,6 +426,10 @@ def update_person(person_id):
             gender = ?,
             birth_date = ?,
             death_date = ?,
+            birth_jd_lo = ?,
+            birth_jd_hi = ?,
+            death_jd_lo = ?,
+            death_jd_hi = ?,
             birth_place = ?,
             birth_lat = ?,
             birth_lng = ?,
@@ -174,16 +445,19 @@ def update_person(person_id):
         data.get('gender'),
         data.get('birth_date'),
         data.get('death_date'),
+        *parse_date_range(data.get('birth_date')),
+        *parse_date_range(data.get('death_date')),
         data.get('birth_place'),
-        data.get('birth_lat'),
-        data.get('birth_lng'),
-        data.get('birth_digipin'),
+        birth_lat,
+        birth_lng,
+        birth_digipin,
         data.get('bio'),
         data.get('relation'),
         now,
         person_id,
         g.current_user['id']
     ))
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     return jsonify({'success': True, 'message': 'Person updated successfully'}), 200
@@ -200,6 +474,7 @@ def delete_person(person_id):
         SET is_deleted = 1, updated_at = ?
         WHERE id = ? AND user_id = ?
     """, (now, person_id, g.current_user['id']))
+    bump_data_version(conn, g.current_user['id'])
     conn.commit()
 
     return jsonify({'success': True, 'message': 'Person deleted successfully'}), 200
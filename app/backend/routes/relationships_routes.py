@@ -2,9 +2,28 @@ from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
 from ..database import get_db_connection
 from ..auth_utils import require_auth
+from ..utils.data_version import bump_data_version, conditional_get
+from ..utils.dates import parse_date_range
+from ..utils.fields import FieldsError, parse_fields, select_list, project
+from ..utils.pagination import PaginationError, get_page_args, page_response
 
 relationships_bp = Blueprint('relationships', __name__, url_prefix='/api/relationships')
 
+# Fields readable through ?fields= (utils/fields)
+RELATIONSHIP_FIELDS = {
+    'id': 'r.id',
+    'person1_id': 'r.person1_id',
+    'person1_name': "p1.given_name || ' ' || p1.family_name",
+    'person2_id': 'r.person2_id',
+    'person2_name': "p2.given_name || ' ' || p2.family_name",
+    'type': 'r.type',
+    'details': 'r.details',
+    'start_date': 'r.start_date',
+    'end_date': 'r.end_date',
+    'created_at': 'r.created_at',
+    'updated_at': 'r.updated_at',
+}
+
 
 @relationships_bp.route('/types', methods=['GET'])
 @require_auth
@@ -15,64 +34,87 @@ def get_relationship_types():
 
 @relationships_bp.route('', methods=['GET'])
 @require_auth
+@conditional_get
 def get_relationships():
     """Retrieve all relationships for the current user."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT
-                r.id,
-                r.person1_id,
-                p1.given_name || ' ' || p1.family_name AS person1_name,
-                r.person2_id,
-                p2.given_name || ' ' || p2.family_name AS person2_name,
-                r.type,
-                r.details,
-                r.start_date,
-                r.end_date,
-                r.created_at,
-                r.updated_at
+        page = get_page_args(
+            request.args, 2,
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        fields = parse_fields(request.args.get('fields'), RELATIONSHIP_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        user_id = g.current_user['id']
+        params = [user_id, user_id, user_id]
+        keyset = ""
+        limit_clause = ""
+        # A page is driven from idx_relationships_user_created (CROSS JOIN
+        # fixes Relationships as the outer loop) so it is a range seek
+        # from the cursor within the user's own relationships.
+        join = "JOIN" if page is None else "CROSS JOIN"
+
+        if page is not None:
+            limit, before = page
+            if before:
+                keyset = "AND (r.created_at, r.id) < (?, ?)"
+                params += before
+            limit_clause = "LIMIT ?"
+            params.append(limit + 1)
+
+        sql = f"""
+            SELECT {select_list(RELATIONSHIP_FIELDS, fields, ('created_at',))}
             FROM Relationships r
-            JOIN People p1 ON r.person1_id = p1.id
-            JOIN People p2 ON r.person2_id = p2.id
-            WHERE p1.user_id = ?
+            {join} People p1 ON r.person1_id = p1.id
+            {join} People p2 ON r.person2_id = p2.id
+            WHERE r.user_id = ?
+              AND p1.user_id = ?
               AND p2.user_id = ?
               AND p1.is_deleted = 0
               AND p2.is_deleted = 0
-            ORDER BY r.created_at DESC
-            """,
-            (g.current_user['id'], g.current_user['id'])
-        )
+              {keyset}
+            ORDER BY r.created_at DESC, r.id DESC
+            {limit_clause}
+            """
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
         rows = cursor.fetchall()
-        rels = [dict(row) for row in rows]
-        return jsonify({'success': True, 'data': rels}), 200
+
+        if page is None:
+            rels = project([dict(row) for row in rows], fields)
+            return jsonify({'success': True, 'data': rels}), 200
+
+        rels, next_cursor = page_response(rows, limit, lambda r: (r['created_at'], r['id']))
+        return jsonify({'success': True, 'data': project(rels, fields), 'next_cursor': next_cursor}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @relationships_bp.route('/<int:rel_id>', methods=['GET'])
 @require_auth
+@conditional_get
 def get_relationship(rel_id):
     """Retrieve a single relationship by ID."""
+    try:
+        fields = parse_fields(request.args.get('fields'), RELATIONSHIP_FIELDS)
+    except FieldsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
-            """
-            SELECT
-                r.id,
-                r.person1_id,
-                p1.given_name || ' ' || p1.family_name AS person1_name,
-                r.person2_id,
-                p2.given_name || ' ' || p2.family_name AS person2_name,
-                r.type,
-                r.details,
-                r.start_date,
-                r.end_date,
-                r.created_at,
-                r.updated_at
+            f"""
+            SELECT {select_list(RELATIONSHIP_FIELDS, fields)}
             FROM Relationships r
             JOIN People p1 ON r.person1_id = p1.id
             JOIN People p2 ON r.person2_id = p2.id
@@ -134,13 +176,20 @@ def create_relationship():
             """
             INSERT INTO Relationships (
                 person1_id, person2_id, type, details,
-                start_date, end_date, created_at, updated_at
+                start_date, end_date,
+                start_jd_lo, start_jd_hi, end_jd_lo, end_jd_hi,
+                created_at, updated_at, user_id
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (person1_id, person2_id, rel_type, details, start_date, end_date, now_iso, now_iso)
+            (
+                person1_id, person2_id, rel_type, details, start_date, end_date,
+                *parse_date_range(start_date), *parse_date_range(end_date),
+                now_iso, now_iso, g.current_user['id']
+            )
         )
         new_id = cursor.lastrowid
+        bump_data_version(conn, g.current_user['id'])
         conn.commit()
 
         return jsonify({'success': True, 'message': 'Relationship created successfully', 'id': int(new_id)}), 201
@@ -210,11 +259,20 @@ def update_relationship(rel_id):
                 details    = ?,
                 start_date = ?,
                 end_date   = ?,
+                start_jd_lo = ?,
+                start_jd_hi = ?,
+                end_jd_lo  = ?,
+                end_jd_hi  = ?,
                 updated_at = ?
             WHERE id = ?
             """,
-            (person1_id, person2_id, rel_type, details, start_date, end_date, now_iso, rel_id)
+            (
+                person1_id, person2_id, rel_type, details, start_date, end_date,
+                *parse_date_range(start_date), *parse_date_range(end_date),
+                now_iso, rel_id
+            )
         )
+        bump_data_version(conn, g.current_user['id'])
         conn.commit()
 
         if cursor.rowcount == 0:
@@ -248,6 +306,7 @@ def delete_relationship(rel_id):
             return jsonify({'success': False, 'error': 'Relationship not found'}), 404
 
         cursor.execute("DELETE FROM Relationships WHERE id = ?", (rel_id,))
+        bump_data_version(conn, g.current_user['id'])
         conn.commit()
         return jsonify({'success': True, 'message': 'Relationship deleted successfully'}), 200
     except Exception as e:
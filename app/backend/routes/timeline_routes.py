@@ -0,0 +1,59 @@
+from flask import Blueprint, request, jsonify, g, current_app
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.data_version import conditional_get
+from ..utils.dates import parse_window
+from ..utils.pagination import PaginationError, get_page_args, encode_cursor
+from ..utils.timeline import SOURCES, timeline_page, valid_cursor
+
+timeline_bp = Blueprint('timeline', __name__, url_prefix='/api/timeline')
+
+
+@timeline_bp.route('', methods=['GET'])
+@require_auth
+@conditional_get
+def get_timeline():
+    """
+    Births, deaths and events in date order, optionally windowed to
+    ?from=&to= (inclusive; any form the date normalizer reads, e.g.
+    from=1850&to=1900 or from=1850-06) and filtered by
+    ?types=birth,death,event. Deaths and events carry the person's `age`
+    when both dates are known. Paginated with ?limit= / ?cursor=.
+    """
+    try:
+        page = get_page_args(
+            request.args, 3,
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    limit, after = page or (current_app.config['DEFAULT_PAGE_SIZE'], None)
+    if after is not None and not valid_cursor(after):
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
+    kinds = None
+    if request.args.get('types'):
+        kinds = [k.strip() for k in request.args['types'].split(',') if k.strip()]
+        if not kinds or any(k not in SOURCES for k in kinds):
+            return jsonify({'success': False, 'error': 'types must be a subset of: ' + ', '.join(SOURCES)}), 400
+
+    try:
+        jd_from, jd_to = parse_window(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    conn = get_db_connection()
+    entries, next_key = timeline_page(
+        conn, g.current_user['id'], limit,
+        jd_from=jd_from,
+        jd_to=jd_to,
+        after=after,
+        kinds=kinds
+    )
+
+    return jsonify({
+        'success': True,
+        'data': entries,
+        'next_cursor': encode_cursor(next_key) if next_key else None
+    }), 200
@@ -0,0 +1,28 @@
+from flask import Blueprint, jsonify, g
+from ..database import get_db_connection
+from ..auth_utils import require_auth
+from ..utils.data_version import conditional_get
+from ..utils.tree_snapshot import tree_snapshot
+
+tree_bp = Blueprint('tree', __name__, url_prefix='/api/tree')
+
+
+@tree_bp.route('/snapshot', methods=['GET'])
+@require_auth
+@conditional_get
+def get_snapshot():
+    """
+    Everything the tree view needs in one response: people,
+    relationships and events in columnar form (see utils/tree_snapshot),
+    read from a single transaction.
+    """
+    conn = get_db_connection()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        snapshot = tree_snapshot(conn, g.current_user['id'])
+    finally:
+        conn.rollback()
+
+    return jsonify({'success': True, 'data': snapshot}), 200
@@ -1,48 +1,76 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
-import os
-from werkzeug.utils import secure_filename
 
 from ..database import get_db_connection
-from ..auth_utils import require_auth
-from ..utils.uploads import allowed_file
+from ..auth_utils import require_auth, get_session_cache
+from ..utils.uploads import allowed_file, read_image_upload, UploadError
+from ..utils.image_store import get_image_store, image_digest, image_url
+from ..utils.photo_jobs import get_photo_processor, create_job, set_job_status
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+def _set_profile_photo(conn, user_id, photo):
+    conn.execute(
+        """
+        UPDATE Users
+        SET profile_photo = ?, updated_at = ?
+        WHERE id = ?
+        """,
+        (photo, datetime.now().isoformat(), user_id)
+    )
+    conn.commit()
+
+
+def _process_profile_photo(conn, job_id, user_id, data, digest):
+    """Photo job body: build the image variants and point profile_photo at them."""
+    get_image_store(current_app).put(data, digest)
+    _set_profile_photo(conn, user_id, image_url(digest))
+    set_job_status(conn, job_id, 'done', photo=image_url(digest))
+
+
 @users_bp.route('/profile-photo', methods=['POST'])
 @require_auth
 def upload_profile_photo():
-    """Upload or update user profile photo."""
+    """
+    Upload or update user profile photo. Stored in the shared image
+    store; new images are resized in the background (202 + job id).
+    """
     try:
         file = request.files.get('photo')
 
         if not file or not allowed_file(file.filename):
             return jsonify({'success': False, 'error': 'Invalid file'}), 400
 
+        try:
+            data = read_image_upload(file, current_app.config['PHOTO_MAX_BYTES'])
+        except UploadError as e:
+            return jsonify({'success': False, 'error': str(e)}), e.status
+
         user_id = g.current_user['id']
-        user_dir = f'uploads/users/{user_id}'
-        os.makedirs(user_dir, exist_ok=True)
+        conn = get_db_connection()
 
-        filename = secure_filename(file.filename)
-        path = os.path.join(user_dir, filename)
-        file.save(path)
+        digest = image_digest(data)
+        if get_image_store(current_app).exists(digest):
+            _set_profile_photo(conn, user_id, image_url(digest))
+            return jsonify({'success': True, 'status': 'done', 'profile_photo': image_url(digest)}), 200
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE Users
-            SET profile_photo = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (path, datetime.now().isoformat(), user_id)
-        )
-        conn.commit()
+        processor = get_photo_processor()
+        if not processor.try_reserve():
+            response = jsonify({'success': False, 'error': 'Photo processing is busy, try again shortly'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+
+        try:
+            job_id = create_job(conn, None, user_id)
+            processor.submit(
+                current_app._get_current_object(), job_id, _process_profile_photo,
+                user_id, data, digest
+            )
+        except Exception:
+            processor.cancel_reservation()
+            raise
 
-        return jsonify({
-            'success': True,
-            'profile_photo': path
-        }), 200
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'pending'}), 202
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -63,6 +91,7 @@ def deactivate_account():
             (datetime.now().isoformat(), g.current_user['id'])
         )
         conn.commit()
+        get_session_cache().invalidate_user(g.current_user['id'])
 
         return jsonify({'success': True, 'message': 'Account deactivated'}), 200
     except Exception as e:
@@ -0,0 +1,160 @@
+"""
+Transactional batches of People / Relationships / Events calls.
+
+Each operation is dispatched to the ordinary view for its method and
+path, in a nested request context that shares the batch's app context:
+the user authenticated once for the batch and the batch's connection
+are reused by every view. The connection is handed out wrapped so the
+views' own commit() calls are no-ops; the batch commits once at the end
+or rolls everything back at the first failing operation.
+
+An operation may name itself with "ref"; a later path segment or body
+value written as "$<ref>" is replaced by the id the earlier operation
+created.
+"""
+from flask import current_app, g, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+# Views an operation may call, by endpoint name
+BATCH_ENDPOINTS = {
+    'people.get_person', 'people.create_person',
+    'people.update_person', 'people.delete_person',
+    'relationships.get_relationship', 'relationships.create_relationship',
+    'relationships.update_relationship', 'relationships.delete_relationship',
+    'events.get_event', 'events.create_event',
+    'events.update_event', 'events.delete_event',
+}
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+
+class BatchError(Exception):
+    """An operation that cannot be dispatched at all."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class BatchConnection:
+    """Connection proxy whose commit() is left to the batch."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _resolve(value, ids):
+    if isinstance(value, str) and value.startswith('$'):
+        if value[1:] not in ids:
+            raise BatchError(f'Unknown reference: {value}')
+        return ids[value[1:]]
+    if isinstance(value, list):
+        return [_resolve(v, ids) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, ids) for k, v in value.items()}
+    return value
+
+
+def _resolve_path(path, ids):
+    path, _, query = path.partition('?')
+    segments = [str(_resolve(s, ids)) if s.startswith('$') else s for s in path.split('/')]
+    return '/'.join(segments) + (f'?{query}' if query else '')
+
+
+def parse_operations(data, max_operations):
+    """Validate the request body; returns the list of operations."""
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list')
+    if len(operations) > max_operations:
+        raise BatchError(f'A batch may hold at most {max_operations} operations')
+
+    refs = set()
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or not isinstance(op.get('path'), str):
+            raise BatchError(f'Operation {index} needs a path')
+        if str(op.get('method', 'GET')).upper() not in METHODS:
+            raise BatchError(f'Operation {index} has an unsupported method')
+        ref = op.get('ref')
+        if ref is not None:
+            if not isinstance(ref, str) or not ref or ref in refs:
+                raise BatchError(f'Operation {index} has an invalid or duplicate ref')
+            refs.add(ref)
+    return operations
+
+
+def _dispatch(op, ids):
+    method = str(op.get('method', 'GET')).upper()
+    path = _resolve_path(op['path'], ids)
+    body = _resolve(op.get('body'), ids)
+
+    builder = EnvironBuilder(
+        path=path, method=method, json=body,
+        headers={'Authorization': request.headers.get('Authorization', '')}
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with current_app.request_context(environ) as ctx:
+        if ctx.request.routing_exception is not None:
+            e = ctx.request.routing_exception
+            raise BatchError(f'{method} {path}: {e.description}', getattr(e, 'code', 404))
+        endpoint = ctx.request.url_rule.endpoint
+        if endpoint not in BATCH_ENDPOINTS:
+            raise BatchError(f'{method} {path} cannot be batched')
+        try:
+            rv = current_app.view_functions[endpoint](**ctx.request.view_args)
+        except HTTPException as e:
+            rv = e
+        response = current_app.make_response(rv)
+        return response.status_code, response.get_json(silent=True)
+
+
+def run_batch(conn, operations):
+    """
+    Run `operations` in one transaction on `conn`. Returns
+    (results, ids, failed_index); failed_index is None if all succeeded
+    and the transaction was committed, otherwise everything was rolled
+    back.
+    """
+    results = []
+    ids = {}
+    previous = g.get('_sqlite_conn')
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    g._sqlite_conn = BatchConnection(conn)
+    # Operations run as the caller; require_auth only reuses this marker
+    g._batch_user = g.current_user
+    try:
+        for index, op in enumerate(operations):
+            try:
+                status, body = _dispatch(op, ids)
+            except BatchError as e:
+                status, body = e.status, {'success': False, 'error': str(e)}
+
+            results.append({'index': index, 'status': status, 'body': body})
+            if status >= 400:
+                conn.rollback()
+                return results, {}, index
+
+            if op.get('ref') is not None and isinstance(body, dict) and 'id' in body:
+                ids[op['ref']] = body['id']
+
+        conn.commit()
+        return results, ids, None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        g._sqlite_conn = previous
+        g.pop('_batch_user', None)
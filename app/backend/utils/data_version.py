@@ -0,0 +1,57 @@
+"""
+Per-user data version used for conditional GETs.
+
+Every write to a user's People / Relationships / Events bumps
+Users.data_version in the same transaction. Read endpoints tag their
+response with a weak ETag built from it and answer a matching
+If-None-Match with 304 before running their query.
+"""
+from functools import wraps
+from flask import request, g, make_response
+
+from ..database import get_db_connection
+from .response_encoding import add_vary
+
+
+def bump_data_version(conn, user_id):
+    """Increment the user's data version; call before the write commits."""
+    conn.execute(
+        "UPDATE Users SET data_version = data_version + 1 WHERE id = ?",
+        (user_id,)
+    )
+
+
+def get_data_version(conn, user_id):
+    row = conn.execute(
+        "SELECT data_version FROM Users WHERE id = ?", (user_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def conditional_get(f):
+    """
+    Decorator for GET views behind @require_auth. The version is read
+    before the view runs, so the ETag can only ever be older than the
+    body it is attached to, never newer.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user_id = g.current_user['id']
+        version = get_data_version(get_db_connection(), user_id)
+        tag = f'{user_id}-{version}'
+
+        if request.if_none_match.contains_weak(tag):
+            response = make_response('', 304)
+            # Same Vary as the 200 it revalidates, so a cache matches
+            # the 304 to the right encoded representation
+            add_vary(response)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(tag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response
+    return decorated
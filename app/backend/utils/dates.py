@@ -0,0 +1,232 @@
+"""
+Genealogical date normalizer.
+
+Free-form date text is mapped to an inclusive range of Julian Day
+Numbers (lo, hi), stored next to the original text in *_jd_lo / *_jd_hi
+columns so dates sort numerically and range filters use an index.
+
+Understood forms (case-insensitive, GEDCOM or ISO):
+
+    1880 / 1880s / JAN 1880 / 12 JAN 1880 / 1880-01 / 1880-01-12
+    ABT, ABOUT, CA, CIRCA, C., EST, CAL <date>    widened by APPROX_YEARS
+    BEF <date> / AFT <date>                       open side capped at OPEN_YEARS
+    BET <date> AND <date> / FROM <date> TO <date> / FROM <date> / TO <date>
+    INT <date> (phrase)                           the date, phrase ignored
+    1700/01                                       dual-dated year
+    @#DJULIAN@ <date>                             Julian calendar
+
+Anything else (pure phrases, "unknown") normalizes to (None, None).
+"""
+import re
+
+APPROX_YEARS = 5
+OPEN_YEARS = 20
+DAYS_PER_YEAR = 365.2425
+
+MONTHS = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+APPROX = {'ABT', 'ABOUT', 'CA', 'CIRCA', 'C', 'EST', 'CAL', 'CALC'}
+
+_ISO_RE = re.compile(r'^(\d{1,4})(?:-(\d{1,2})(?:-(\d{1,2})(?:T.*)?)?)?$')
+_DECADE_RE = re.compile(r'^(\d{3})0S$')
+_DUAL_RE = re.compile(r'^(\d{3,4})/(\d{1,2})$')
+_CALENDAR_RE = re.compile(r'@#D([A-Z ]+)@')
+
+
+def julian_day(year, month, day, julian_calendar=False):
+    """Julian Day Number of a Gregorian (or Julian-calendar) date."""
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    jdn = day + (153 * m + 2) // 5 + 365 * y + y // 4 - 32083
+    if not julian_calendar:
+        jdn += y // 400 - y // 100 + 38
+    return jdn
+
+
+def gregorian_date(jdn):
+    """(year, month, day) of a Julian Day Number in the Gregorian calendar."""
+    a = jdn + 32044
+    b = (4 * a + 3) // 146097
+    c = a - 146097 * b // 4
+    d = (4 * c + 3) // 1461
+    e = c - 1461 * d // 4
+    m = (5 * e + 2) // 153
+    return (
+        100 * b + d - 4800 + m // 10,
+        m + 3 - 12 * (m // 10),
+        e - (153 * m + 2) // 5 + 1
+    )
+
+
+def _days_in_month(year, month, julian_calendar):
+    if month == 12:
+        return 31
+    return julian_day(year, month + 1, 1, julian_calendar) - julian_day(year, month, 1, julian_calendar)
+
+
+def _span(year, month=None, day=None, julian_calendar=False):
+    """(lo, hi) JDN covering a year, a month, or a single day."""
+    if month is None:
+        return julian_day(year, 1, 1, julian_calendar), julian_day(year, 12, 31, julian_calendar)
+    if day is None:
+        return (
+            julian_day(year, month, 1, julian_calendar),
+            julian_day(year, month, _days_in_month(year, month, julian_calendar), julian_calendar)
+        )
+    return (julian_day(year, month, day, julian_calendar),) * 2
+
+
+def _parse_simple(text, julian_calendar=False):
+    """(lo, hi) for a single, unqualified date; None if not a date."""
+    text = text.strip().strip('.,')
+    if not text:
+        return None
+
+    m = _ISO_RE.match(text)
+    if m:
+        year = int(m.group(1))
+        month = int(m.group(2)) if m.group(2) else None
+        day = int(m.group(3)) if m.group(3) else None
+        if month is not None and not 1 <= month <= 12:
+            return None
+        if day is not None and not 1 <= day <= _days_in_month(year, month, julian_calendar):
+            return None
+        return _span(year, month, day, julian_calendar)
+
+    m = _DECADE_RE.match(text)
+    if m:
+        start = int(m.group(1)) * 10
+        return _span(start, julian_calendar=julian_calendar)[0], _span(start + 9, julian_calendar=julian_calendar)[1]
+
+    parts = text.replace(',', ' ').split()
+    dual = _DUAL_RE.match(parts[-1]) if parts else None
+    if dual:
+        year = int(dual.group(1))
+        if len(parts) == 1:
+            return _span(year, julian_calendar=julian_calendar)[0], _span(year + 1, julian_calendar=julian_calendar)[1]
+        parts[-1] = str(year)
+    return _parse_parts(parts, julian_calendar)
+
+
+def _parse_parts(parts, julian_calendar):
+    """['12', 'JAN', '1880'] / ['JAN', '1880'] / ['1880'] -> (lo, hi)."""
+    if not parts or not parts[-1].isdigit():
+        return None
+    year = int(parts[-1])
+    if len(parts) == 1:
+        return _span(year, julian_calendar=julian_calendar)
+
+    month = MONTHS.get(parts[-2][:3])
+    if month is None:
+        return None
+    if len(parts) == 2:
+        return _span(year, month, julian_calendar=julian_calendar)
+
+    if len(parts) == 3 and parts[0].isdigit():
+        day = int(parts[0])
+        if 1 <= day <= _days_in_month(year, month, julian_calendar):
+            return _span(year, month, day, julian_calendar)
+    return None
+
+
+def _years(n):
+    return int(round(n * DAYS_PER_YEAR))
+
+
+def parse_date_range(value):
+    """Free-form date text -> (jd_lo, jd_hi), or (None, None)."""
+    if value is None:
+        return None, None
+    text = str(value).strip().upper()
+    if not text:
+        return None, None
+
+    julian_calendar = False
+    cal = _CALENDAR_RE.search(text)
+    if cal:
+        julian_calendar = cal.group(1).strip() == 'JULIAN'
+        text = _CALENDAR_RE.sub(' ', text).strip()
+
+    # Interpreted dates carry a phrase in parentheses
+    text = re.sub(r'\(.*?\)', ' ', text).strip()
+    if text.startswith('INT '):
+        text = text[4:]
+
+    words = text.split(None, 1)
+    head = words[0].rstrip('.') if words else ''
+    rest = words[1] if len(words) > 1 else ''
+
+    try:
+        if head in ('BET', 'BETWEEN') and ' AND ' in f' {rest} ':
+            first, second = re.split(r'\bAND\b', rest, maxsplit=1)
+            a, b = _parse_simple(first, julian_calendar), _parse_simple(second, julian_calendar)
+            if a and b:
+                return min(a[0], b[0]), max(a[1], b[1])
+            return None, None
+
+        if head == 'FROM':
+            first, _, second = rest.partition(' TO ')
+            a = _parse_simple(first, julian_calendar)
+            if not a:
+                return None, None
+            b = _parse_simple(second, julian_calendar) if second else None
+            return a[0], (b[1] if b else a[1] + _years(OPEN_YEARS))
+
+        if head == 'TO':
+            b = _parse_simple(rest, julian_calendar)
+            return (b[0] - _years(OPEN_YEARS), b[1]) if b else (None, None)
+
+        if head in ('BEF', 'BEFORE'):
+            b = _parse_simple(rest, julian_calendar)
+            return (b[0] - _years(OPEN_YEARS), b[0] - 1) if b else (None, None)
+
+        if head in ('AFT', 'AFTER'):
+            a = _parse_simple(rest, julian_calendar)
+            return (a[1] + 1, a[1] + _years(OPEN_YEARS)) if a else (None, None)
+
+        if head in APPROX:
+            a = _parse_simple(rest, julian_calendar)
+            return (a[0] - _years(APPROX_YEARS), a[1] + _years(APPROX_YEARS)) if a else (None, None)
+
+        return _parse_simple(text, julian_calendar) or (None, None)
+    except (ValueError, IndexError):
+        return None, None
+
+
+def _whole_years(start, end):
+    """Completed calendar years from JDN `start` to JDN `end`."""
+    start_year, start_month, start_day = gregorian_date(start)
+    end_year, end_month, end_day = gregorian_date(end)
+    return end_year - start_year - ((end_month, end_day) < (start_month, start_day))
+
+
+def age_years(birth_lo, birth_hi, later_lo, later_hi):
+    """
+    Age in whole years at a later date, or None: the mean of the ages
+    between the two lower bounds and between the two upper bounds. Exact
+    dates give the calendar age; 1890 -> 1950 gives 60.
+    """
+    if None in (birth_lo, birth_hi, later_lo, later_hi):
+        return None
+    return (_whole_years(birth_lo, later_lo) + _whole_years(birth_hi, later_hi)) // 2
+
+
+def parse_window(date_from, date_to):
+    """
+    ?from= / ?to= text -> (jd_lo, jd_hi) for an inclusive window; either
+    side is None when not given. `to=1900` reaches 31 Dec 1900. Raises
+    ValueError if a given side is not a date.
+    """
+    lo = hi = None
+    if date_from:
+        lo = parse_date_range(date_from)[0]
+        if lo is None:
+            raise ValueError(f'Unrecognised date: {date_from}')
+    if date_to:
+        hi = parse_date_range(date_to)[1]
+        if hi is None:
+            raise ValueError(f'Unrecognised date: {date_to}')
+    return lo, hi
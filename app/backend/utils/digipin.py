@@ -0,0 +1,112 @@
+"""
+DIGIPIN (India Post digital address) encoder / decoder.
+
+The bounding box 2.5-38.5 N, 63.5-99.5 E is split into a 4x4 grid ten
+times over; each level adds one symbol, so a code's prefixes are the
+cells that contain it. Codes are stored in canonical form, upper case
+with hyphens after the 3rd and 6th symbol (FC9-8J3-2K45), which keeps
+prefix order equal to string order for the (user_id, *_digipin)
+indexes.
+"""
+
+GRID = (
+    ('F', 'C', '9', '8'),
+    ('J', '3', '2', '7'),
+    ('K', '4', '5', '6'),
+    ('L', 'M', 'P', 'T'),
+)
+POSITIONS = {symbol: (r, c) for r, row in enumerate(GRID) for c, symbol in enumerate(row)}
+
+MIN_LAT, MAX_LAT = 2.5, 38.5
+MIN_LNG, MAX_LNG = 63.5, 99.5
+LEVELS = 10
+
+# Sorts after every symbol and '-', so [prefix, prefix + PREFIX_END) is a prefix range
+PREFIX_END = '~'
+
+
+def in_bounds(lat, lng):
+    return MIN_LAT <= lat <= MAX_LAT and MIN_LNG <= lng <= MAX_LNG
+
+
+def format_code(symbols):
+    """'FC98J32K45' -> 'FC9-8J3-2K45' (works for any prefix length)."""
+    parts = (symbols[:3], symbols[3:6], symbols[6:])
+    return '-'.join(p for p in parts if p)
+
+
+def normalize(code, min_length=1):
+    """
+    Canonical form of a full code or prefix; raises ValueError for
+    anything that is not a DIGIPIN.
+    """
+    symbols = str(code).upper().replace('-', '').replace(' ', '')
+    if not (min_length <= len(symbols) <= LEVELS):
+        raise ValueError(f'DIGIPIN must have between {min_length} and {LEVELS} symbols')
+    bad = sorted(set(symbols) - POSITIONS.keys())
+    if bad:
+        raise ValueError(f"Invalid DIGIPIN symbol(s): {''.join(bad)}")
+    return format_code(symbols)
+
+
+def encode(lat, lng, levels=LEVELS):
+    """Code of the cell at `levels` precision containing (lat, lng)."""
+    if not in_bounds(lat, lng):
+        raise ValueError('Coordinates are outside the DIGIPIN area')
+
+    min_lat, max_lat, min_lng, max_lng = MIN_LAT, MAX_LAT, MIN_LNG, MAX_LNG
+    symbols = []
+    for _ in range(levels):
+        lat_div = (max_lat - min_lat) / 4
+        lng_div = (max_lng - min_lng) / 4
+        row = min(3, max(0, 3 - int((lat - min_lat) // lat_div)))
+        col = min(3, max(0, int((lng - min_lng) // lng_div)))
+        symbols.append(GRID[row][col])
+
+        max_lat = min_lat + lat_div * (4 - row)
+        min_lat = min_lat + lat_div * (3 - row)
+        min_lng = min_lng + lng_div * col
+        max_lng = min_lng + lng_div
+    return format_code(''.join(symbols))
+
+
+def decode_bounds(code):
+    """(south, west, north, east) of the cell named by a code or prefix."""
+    symbols = normalize(code).replace('-', '')
+    min_lat, max_lat, min_lng, max_lng = MIN_LAT, MAX_LAT, MIN_LNG, MAX_LNG
+    for symbol in symbols:
+        row, col = POSITIONS[symbol]
+        lat_div = (max_lat - min_lat) / 4
+        lng_div = (max_lng - min_lng) / 4
+        max_lat, min_lat = max_lat - lat_div * row, max_lat - lat_div * (row + 1)
+        min_lng, max_lng = min_lng + lng_div * col, min_lng + lng_div * (col + 1)
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def decode(code):
+    """Centre (lat, lng) of the cell."""
+    south, west, north, east = decode_bounds(code)
+    return (south + north) / 2, (west + east) / 2
+
+
+def prefix_length(levels):
+    """Length of the canonical prefix for `levels` symbols (hyphens included)."""
+    return levels + (levels > 3) + (levels > 6)
+
+
+def fill_location(lat, lng, code):
+    """
+    Complete a (lat, lng, digipin) triple from whichever half was given:
+    a code fills in missing coordinates (cell centre), coordinates inside
+    the DIGIPIN area fill in a missing code. The code is returned in
+    canonical form; ValueError if it is invalid.
+    """
+    if code not in (None, ''):
+        code = normalize(code)
+        if lat is None and lng is None:
+            lat, lng = decode(code)
+    else:
+        code = None
+        if lat is not None and lng is not None and in_bounds(float(lat), float(lng)):
+            code = encode(float(lat), float(lng))
+    return lat, lng, code
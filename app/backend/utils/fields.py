@@ -0,0 +1,50 @@
+"""
+Sparse fieldsets for read endpoints (?fields=id,given_name,family_name).
+
+A resource declares its readable fields as an ordered {name: SQL
+expression} whitelist; the requested subset becomes the SELECT list, so
+unrequested columns are never read (and a narrow enough list can be
+answered from an index alone). Columns a view needs internally, such as
+the pagination key, are selected as well and trimmed from the output.
+"""
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def parse_fields(value, allowed):
+    """
+    '?fields=' text -> list of field names in whitelist order, or None
+    for all fields. `id` is always included. Raises FieldsError on
+    unknown names.
+    """
+    if not value:
+        return None
+    requested = {f.strip() for f in value.split(',') if f.strip()}
+    unknown = sorted(requested - allowed.keys())
+    if unknown:
+        raise FieldsError(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    requested.add('id')
+    return [name for name in allowed if name in requested]
+
+
+def select_list(allowed, fields=None, extra=()):
+    """
+    SQL select list for `fields` (all when None) plus the `extra` field
+    names the caller needs, e.g. its sort key.
+    """
+    names = list(allowed) if fields is None else fields + [n for n in extra if n not in fields]
+    return ', '.join(
+        expr if expr.split('.')[-1] == name else f'{expr} AS {name}'
+        for name, expr in ((n, allowed[n]) for n in names)
+    )
+
+
+def project(data, fields):
+    """Drop the helper columns select_list added from row dicts."""
+    if fields is None or (data and len(data[0]) == len(fields)):
+        return data
+    return [{name: row[name] for name in fields} for row in data]
@@ -0,0 +1,255 @@
+"""
+Minimal streaming GEDCOM 5.5.1 reader.
+
+Lines are read one at a time from a binary stream and grouped into
+level-0 records, so memory use is bounded by the largest single record
+rather than the size of the file.
+"""
+import codecs
+
+SEX_VALUES = {'M': 'Male', 'F': 'Female'}
+
+# Individual events other than BIRT/DEAT that become Events rows
+INDI_EVENT_TAGS = {
+    'ADOP': 'Adoption', 'BAPM': 'Baptism', 'BARM': 'Bar Mitzvah',
+    'BASM': 'Bas Mitzvah', 'BURI': 'Burial', 'CENS': 'Census',
+    'CHR': 'Christening', 'CONF': 'Confirmation', 'CREM': 'Cremation',
+    'EDUC': 'Education', 'EMIG': 'Emigration', 'EVEN': 'Event',
+    'GRAD': 'Graduation', 'IMMI': 'Immigration', 'NATU': 'Naturalization',
+    'OCCU': 'Occupation', 'RESI': 'Residence', 'RETI': 'Retirement',
+    'WILL': 'Will',
+}
+
+
+class GedcomNode:
+    __slots__ = ('level', 'xref', 'tag', 'value', 'children')
+
+    def __init__(self, level, xref, tag, value):
+        self.level = level
+        self.xref = xref
+        self.tag = tag
+        self.value = value
+        self.children = []
+
+    def first(self, tag):
+        for child in self.children:
+            if child.tag == tag:
+                return child
+        return None
+
+    def all(self, tag):
+        return [c for c in self.children if c.tag == tag]
+
+    def child_value(self, tag):
+        node = self.first(tag)
+        return node.text() if node else None
+
+    def text(self):
+        """Value with CONT/CONC continuation lines folded in."""
+        parts = [self.value or '']
+        for child in self.children:
+            if child.tag == 'CONT':
+                parts.append('\n' + (child.value or ''))
+            elif child.tag == 'CONC':
+                parts.append(child.value or '')
+        return ''.join(parts) or None
+
+
+def iter_lines(stream, stats, chunk_size=1 << 20):
+    """Yield decoded, stripped, non-empty lines from a binary stream."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    first = True
+
+    while True:
+        chunk = stream.read(chunk_size)
+        stats['bytes'] += len(chunk)
+        text = pending + decoder.decode(chunk, final=not chunk)
+        if first and text:
+            text = text.lstrip('\ufeff')
+            first = False
+
+        lines = text.splitlines()
+        if chunk and lines and not text.endswith(('\n', '\r')):
+            pending = lines.pop()
+        else:
+            pending = ''
+
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+
+        if not chunk:
+            break
+
+
+def iter_records(stream, stats=None):
+    """
+    Yield level-0 GedcomNode records from a binary stream.
+
+    `stats`, if given, is a dict updated with 'lines', 'bytes' and
+    'malformed' counts as the stream is consumed.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('lines', 0)
+    stats.setdefault('bytes', 0)
+    stats.setdefault('malformed', 0)
+
+    record = None
+    stack = []
+    lines = 0
+
+    for line in iter_lines(stream, stats):
+        lines += 1
+        # level [xref] tag [value], split inline: this runs once per line
+        parts = line.split(' ', 2)
+        if len(parts) < 2 or not parts[0].isdigit():
+            stats['malformed'] += 1
+            continue
+        level = int(parts[0])
+        if len(parts) == 3 and parts[1][:1] == '@':
+            xref = parts[1]
+            tag, sep, value = parts[2].partition(' ')
+            value = value if sep else None
+        else:
+            xref = None
+            tag = parts[1]
+            value = parts[2] if len(parts) == 3 else None
+
+        node = GedcomNode(level, xref, tag.upper(), value)
+        if level == 0:
+            if record is not None:
+                stats['lines'] += lines
+                lines = 0
+                yield record
+            record = node
+            stack = [node]
+            continue
+
+        if record is None:
+            stats['malformed'] += 1
+            continue
+
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        if not stack:
+            stats['malformed'] += 1
+            continue
+        stack[-1].children.append(node)
+        stack.append(node)
+
+    stats['lines'] += lines
+    if record is not None:
+        yield record
+
+
+def split_name(value):
+    """'John /Smith/ Jr' -> ('John Jr', 'Smith')."""
+    if not value:
+        return '', ''
+    if '/' not in value:
+        return value.strip(), ''
+    given, _, rest = value.partition('/')
+    surname, _, suffix = rest.partition('/')
+    given = ' '.join(p for p in (given.strip(), suffix.strip()) if p)
+    return given, surname.strip()
+
+
+def parse_coordinate(value):
+    """'N12.97' / 'W77.5' / '-3.1' -> signed float, or None."""
+    if not value:
+        return None
+    value = value.strip().upper()
+    sign = 1
+    if value[:1] in ('N', 'E'):
+        value = value[1:]
+    elif value[:1] in ('S', 'W'):
+        sign = -1
+        value = value[1:]
+    try:
+        return sign * float(value)
+    except ValueError:
+        return None
+
+
+def event_fields(node):
+    """(date, place, lat, lng) for a GEDCOM event structure."""
+    date = node.child_value('DATE')
+    place_node = node.first('PLAC')
+    place = lat = lng = None
+    if place_node is not None:
+        place = place_node.value
+        map_node = place_node.first('MAP')
+        if map_node is not None:
+            lat = parse_coordinate(map_node.child_value('LATI'))
+            lng = parse_coordinate(map_node.child_value('LONG'))
+    return date, place, lat, lng
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+          'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+EVENT_TITLE_TAGS = {title.lower(): tag for tag, title in INDI_EVENT_TAGS.items()}
+
+GENDER_SEX = {'male': 'M', 'female': 'F'}
+
+
+def format_line(level, tag, value=None, xref=None):
+    """
+    Render one GEDCOM line; embedded newlines become CONT lines at
+    level + 1.
+    """
+    head = f'{level} {xref} {tag}' if xref else f'{level} {tag}'
+    if value is None or value == '':
+        return head + '\n'
+
+    text = str(value)
+    if '\n' not in text and '\r' not in text:
+        return f'{head} {text}\n'
+
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    first, *rest = text.split('\n')
+    out = [f'{head} {first}' if first else head]
+    out.extend(f'{level + 1} CONT {line}' if line else f'{level + 1} CONT' for line in rest)
+    return '\n'.join(out) + '\n'
+
+
+def format_date(value):
+    """ISO 'YYYY-MM-DD' / 'YYYY-MM' -> GEDCOM form; anything else unchanged."""
+    if not value:
+        return None
+    parts = str(value).strip().split('-')
+    try:
+        if len(parts) == 3 and len(parts[0]) == 4:
+            return f'{int(parts[2])} {MONTHS[int(parts[1]) - 1]} {parts[0]}'
+        if len(parts) == 2 and len(parts[0]) == 4:
+            return f'{MONTHS[int(parts[1]) - 1]} {parts[0]}'
+    except (ValueError, IndexError):
+        pass
+    return str(value).strip()
+
+
+def format_coordinate(value, positive, negative):
+    if value is None:
+        return None
+    return f'{positive if value >= 0 else negative}{abs(value):.6f}'.rstrip('0').rstrip('.')
+
+
+def format_event(level, tag, date=None, place=None, lat=None, lng=None, value=None):
+    """Lines for an event structure (BIRT, DEAT, MARR, ...)."""
+    out = [format_line(level, tag, value)]
+    if date:
+        out.append(format_line(level + 1, 'DATE', format_date(date)))
+    if place or (lat is not None and lng is not None):
+        out.append(format_line(level + 1, 'PLAC', place))
+        if lat is not None and lng is not None:
+            out.append(format_line(level + 2, 'MAP'))
+            out.append(format_line(level + 3, 'LATI', format_coordinate(lat, 'N', 'S')))
+            out.append(format_line(level + 3, 'LONG', format_coordinate(lng, 'E', 'W')))
+    return ''.join(out)
@@ -0,0 +1,201 @@
+"""
+Viewport and nearest-neighbour queries over the People_geo / Events_geo
+R*Tree indexes (migration v11).
+
+Boxes are (south, west, north, east) in degrees. A box whose west edge
+is greater than its east edge crosses the antimeridian and is queried
+as two halves.
+
+DIGIPIN cells are queried as string-prefix ranges over the
+(user_id, *_digipin) indexes (migration v12).
+"""
+import math
+
+from .digipin import PREFIX_END
+
+EARTH_RADIUS_KM = 6371.0088
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+KM_PER_DEGREE = 2 * HALF_CIRCUMFERENCE_KM / 360
+
+# kind -> (SELECT ... FROM <rtree> JOIN <table>, exact lat column, exact
+# lng column, exact owner filter). The R*Tree's user dimension is a
+# float32, so ids above 2**24 round together there: it only prunes, and
+# ownership is decided on the base row. CROSS JOIN keeps the R*Tree as
+# the outer loop; otherwise the planner may walk all of the user's rows
+# and probe the R*Tree by id.
+GEO_SOURCES = {
+    'people': (
+        """
+        SELECT p.id, p.given_name, p.family_name, p.birth_date,
+               p.birth_place AS place, p.birth_lat AS lat, p.birth_lng AS lng
+        FROM People_geo gi
+        CROSS JOIN People p ON p.id = gi.id
+        """,
+        'p.birth_lat', 'p.birth_lng', 'p.user_id = ? AND p.is_deleted = 0'
+    ),
+    'events': (
+        """
+        SELECT e.id, e.title, e.event_date, e.place, e.created_by,
+               e.place_lat AS lat, e.place_lng AS lng
+        FROM Events_geo gi
+        CROSS JOIN Events e ON e.id = gi.id
+        """,
+        'e.place_lat', 'e.place_lng', 'e.user_id = ?'
+    ),
+}
+
+
+def parse_bbox(value):
+    """'west,south,east,north' -> (south, west, north, east); ValueError if invalid."""
+    try:
+        west, south, east, north = (float(v) for v in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be west,south,east,north')
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError('bbox is out of range')
+    return south, west, north, east
+
+
+def parse_kinds(value):
+    """'people,events' -> ['people', 'events']; ValueError on unknown kinds."""
+    kinds = [k.strip() for k in (value or ','.join(GEO_SOURCES)).split(',') if k.strip()]
+    unknown = [k for k in kinds if k not in GEO_SOURCES]
+    if unknown or not kinds:
+        raise ValueError('types must be a subset of: ' + ', '.join(GEO_SOURCES))
+    return kinds
+
+
+def split_antimeridian(bbox):
+    south, west, north, east = bbox
+    if west <= east:
+        return [bbox]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(lat, lng, radius_km):
+    """Boxes (antimeridian-split) that contain the circle of `radius_km`."""
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    widest = max(abs(south), abs(north))
+    if widest >= 90 or radius_km >= HALF_CIRCUMFERENCE_KM / 2:
+        return [(south, -180.0, north, 180.0)]
+
+    dlng = dlat / math.cos(math.radians(widest))
+    if dlng >= 180:
+        return [(south, -180.0, north, 180.0)]
+    west = (lng - dlng + 540) % 360 - 180
+    east = (lng + dlng + 540) % 360 - 180
+    return split_antimeridian((south, west, north, east))
+
+
+def query_boxes(conn, user_id, kind, boxes, limit=None):
+    """Rows of `kind` owned by `user_id` inside any of `boxes`, as dicts."""
+    select, lat_col, lng_col, owner = GEO_SOURCES[kind]
+    sql = select + f"""
+        WHERE gi.min_user <= ? AND gi.max_user >= ?
+          AND gi.max_lat >= ? AND gi.min_lat <= ?
+          AND gi.max_lng >= ? AND gi.min_lng <= ?
+          AND {owner}
+          AND {lat_col} BETWEEN ? AND ?
+          AND {lng_col} BETWEEN ? AND ?
+    """
+    if limit is not None:
+        sql += " LIMIT ?"
+
+    rows = {}
+    for south, west, north, east in boxes:
+        params = [user_id, user_id, south, north, west, east, user_id, south, north, west, east]
+        if limit is not None:
+            params.append(limit - len(rows))
+        for row in conn.execute(sql, params):
+            rows[row['id']] = dict(row)
+        if limit is not None and len(rows) >= limit:
+            break
+    return list(rows.values())
+
+
+def nearest(conn, user_id, kind, lat, lng, k, start_km=10.0):
+    """
+    The `k` rows of `kind` nearest to (lat, lng), each with distance_km.
+
+    R*Tree has no native kNN, so the search box grows until at least `k`
+    rows fall inside the circle it contains; anything outside that
+    circle could still be beaten by an unseen row and is not trusted.
+    """
+    radius = start_km
+    while True:
+        found = []
+        for row in query_boxes(conn, user_id, kind, bbox_around(lat, lng, radius)):
+            row['distance_km'] = round(haversine_km(lat, lng, row['lat'], row['lng']), 3)
+            found.append(row)
+        found.sort(key=lambda r: (r['distance_km'], r['id']))
+
+        covers_globe = radius >= HALF_CIRCUMFERENCE_KM
+        inside = [r for r in found if r['distance_km'] <= radius]
+        if len(inside) >= k or covers_globe:
+            return (found if covers_globe else inside)[:k]
+        radius *= 4
+
+
+# ---------------------------------------------------------------------------
+# DIGIPIN cells (prefix range scans on idx_*_user_digipin)
+# ---------------------------------------------------------------------------
+
+# kind -> (table, selected columns, digipin column, owner filter)
+DIGIPIN_SOURCES = {
+    'people': (
+        'People',
+        """
+        id, given_name, family_name, birth_date, birth_place AS place,
+        birth_lat AS lat, birth_lng AS lng, birth_digipin AS digipin
+        """,
+        'birth_digipin', 'user_id = ? AND is_deleted = 0'
+    ),
+    'events': (
+        'Events',
+        """
+        id, title, event_date, place, created_by,
+        place_lat AS lat, place_lng AS lng, place_digipin AS digipin
+        """,
+        'place_digipin', 'user_id = ?'
+    ),
+}
+
+
+def rows_in_cell(conn, user_id, kind, prefix, limit):
+    """Rows of `kind` whose DIGIPIN lies in the cell `prefix` (canonical form)."""
+    table, columns, column, owner = DIGIPIN_SOURCES[kind]
+    sql = f"""
+        SELECT {columns}
+        FROM {table}
+        WHERE {owner}
+          AND {column} >= ? AND {column} < ?
+        ORDER BY {column}, id
+        LIMIT ?
+    """
+    rows = conn.execute(sql, (user_id, prefix, prefix + PREFIX_END, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def count_cells(conn, user_id, kind, length, prefix=''):
+    """[(cell, count)] grouping `kind` by the first `length` characters of its DIGIPIN."""
+    table, _, column, owner = DIGIPIN_SOURCES[kind]
+    sql = f"""
+        SELECT substr({column}, 1, ?) AS cell, COUNT(*) AS count
+        FROM {table}
+        WHERE {owner}
+          AND {column} >= ? AND {column} < ?
+          AND length({column}) >= ?
+        GROUP BY cell
+        ORDER BY cell
+    """
+    rows = conn.execute(sql, (length, user_id, prefix, prefix + PREFIX_END, length)).fetchall()
+    return [(r['cell'], r['count']) for r in rows]
@@ -0,0 +1,128 @@
+"""
+Content-addressed image store.
+
+An upload is keyed by the SHA-256 of its bytes and stored once as a set
+of pre-generated variants (one per configured size, in JPEG and, when
+Pillow supports it, WebP):
+
+    <root>/<digest[:2]>/<digest>/<size>.jpg
+    <root>/<digest[:2]>/<digest>/<size>.webp
+
+Identical uploads (the same photo on several people, re-uploads) hit the
+existing variants and are never decoded again.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError, features
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+FORMATS = {
+    'jpeg': ('jpg', 'JPEG', 'image/jpeg'),
+    'webp': ('webp', 'WEBP', 'image/webp'),
+}
+
+COMPLETE_MARKER = '.complete'
+
+
+def image_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_url(digest):
+    """Value stored in People.photo / Users.profile_photo."""
+    return f'/api/images/{digest}'
+
+
+class ImageStore:
+
+    def __init__(self, root, sizes=(64, 256, 1024), quality=80):
+        self.root = root
+        self.sizes = tuple(sorted(sizes))
+        self.quality = quality
+        self.formats = ['jpeg'] + (['webp'] if features.check('webp') else [])
+
+    def _dir(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(os.path.join(self._dir(digest), COMPLETE_MARKER))
+
+    def put(self, data, digest=None):
+        """Store `data` (raw upload bytes) and return its digest."""
+        digest = digest or image_digest(data)
+        if self.exists(digest):
+            return digest
+
+        try:
+            img = Image.open(BytesIO(data))
+            img.load()
+        except (UnidentifiedImageError, OSError):
+            raise ValueError("Uploaded file is not a valid image")
+
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        else:
+            img = img.convert("RGB")
+
+        target = self._dir(digest)
+        os.makedirs(target, exist_ok=True)
+
+        # Largest first, each variant scaled down from the previous one
+        for size in reversed(self.sizes):
+            img.thumbnail((size, size))
+            for fmt in self.formats:
+                ext, pil_format, _ = FORMATS[fmt]
+                self._write(img, os.path.join(target, f'{size}.{ext}'), pil_format)
+
+        with open(os.path.join(target, COMPLETE_MARKER), 'w'):
+            pass
+        return digest
+
+    def _write(self, img, path, pil_format):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if pil_format == 'JPEG':
+                    img.save(f, format='JPEG', quality=self.quality, optimize=True, progressive=True)
+                else:
+                    img.save(f, format=pil_format, quality=self.quality, method=4)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def pick_size(self, requested):
+        """Smallest stored size >= requested (largest if none is big enough)."""
+        for size in self.sizes:
+            if size >= requested:
+                return size
+        return self.sizes[-1]
+
+    def variant(self, digest, size, fmt):
+        """(path, mimetype) of a variant, or None if it is not stored."""
+        if fmt not in self.formats:
+            return None
+        ext, _, mimetype = FORMATS[fmt]
+        path = os.path.join(self._dir(digest), f'{size}.{ext}')
+        return (path, mimetype) if os.path.isfile(path) else None
+
+
+def get_image_store(app):
+    store = app.extensions.get('image_store')
+    if store is None:
+        store = ImageStore(
+            os.path.join(app.config['UPLOAD_FOLDER'], 'images'),
+            sizes=app.config.get('PHOTO_VARIANT_SIZES', (64, 256, 1024)),
+            quality=app.config.get('PHOTO_QUALITY', 80)
+        )
+        app.extensions['image_store'] = store
+    return store
@@ -0,0 +1,223 @@
+"""
+Kinship calculation: shortest path through the relationship graph and a
+plain-English label for it ("great-aunt", "second cousin once removed").
+
+Relationships are stored as "person1 is <type> of person2". Each edge is
+turned into a move seen from the person walking it:
+    U  - to a parent        D  - to a child
+    S  - to a spouse        B  - to a sibling
+"""
+import re
+
+ORDINALS = ['zeroth', 'first', 'second', 'third', 'fourth', 'fifth',
+            'sixth', 'seventh', 'eighth', 'ninth', 'tenth']
+
+REMOVED = {1: 'once', 2: 'twice', 3: 'thrice'}
+
+# (male, female, neutral)
+WORDS = {
+    'self':    ('self', 'self', 'self'),
+    'spouse':  ('husband', 'wife', 'spouse'),
+    'parent':  ('father', 'mother', 'parent'),
+    'child':   ('son', 'daughter', 'child'),
+    'sibling': ('brother', 'sister', 'sibling'),
+    'pibling': ('uncle', 'aunt', 'aunt/uncle'),
+    'nibling': ('nephew', 'niece', 'niece/nephew'),
+}
+
+PATTERN = re.compile(r'^(S?)(U*)(D*)(S?)$')
+
+
+def build_adjacency(conn, user_id, parent_types, spouse_types, sibling_types):
+    """
+    Load every relationship between the user's live people into an
+    adjacency dict: person_id -> [(neighbour_id, move), ...].
+    """
+    rows = conn.execute(
+        """
+        SELECT r.person1_id, r.person2_id, r.type
+        FROM Relationships r
+        JOIN People p1 ON r.person1_id = p1.id
+        JOIN People p2 ON r.person2_id = p2.id
+        WHERE p1.user_id = ?
+          AND p2.user_id = ?
+          AND p1.is_deleted = 0
+          AND p2.is_deleted = 0
+        """,
+        (user_id, user_id)
+    )
+
+    adj = {}
+    for p1, p2, rel_type in rows:
+        if rel_type in parent_types:
+            forward, backward = 'D', 'U'
+        elif rel_type in spouse_types:
+            forward = backward = 'S'
+        elif rel_type in sibling_types:
+            forward = backward = 'B'
+        else:
+            continue
+        adj.setdefault(p1, []).append((p2, forward))
+        adj.setdefault(p2, []).append((p1, backward))
+    return adj
+
+
+def shortest_path(adj, start, goal):
+    """
+    Bidirectional BFS from `start` to `goal`.
+
+    Returns [(person_id, move_into_person), ...] beginning with
+    (start, None), or None when the two are not connected.
+    """
+    if start == goal:
+        return [(start, None)]
+
+    # node -> (previous node, move from previous to node)
+    came_from = {start: None}
+    # node -> (next node, move from node to next)
+    goes_to = {goal: None}
+    front, back = [start], [goal]
+
+    meet = None
+    while front and back and meet is None:
+        if len(front) <= len(back):
+            front, meet = _expand(adj, front, came_from, goes_to, forward=True)
+        else:
+            back, meet = _expand(adj, back, goes_to, came_from, forward=False)
+
+    if meet is None:
+        return None
+
+    path = []
+    node = meet
+    while node is not None:
+        link = came_from[node]
+        path.append((node, link[1] if link else None))
+        node = link[0] if link else None
+    path.reverse()
+
+    node = meet
+    while goes_to[node] is not None:
+        nxt, move = goes_to[node]
+        path.append((nxt, move))
+        node = nxt
+    return path
+
+
+def _expand(adj, frontier, seen, other, forward):
+    """Expand one BFS level; return the next frontier and a meeting node."""
+    nxt = []
+    for node in frontier:
+        for neighbour, move in adj.get(node, ()):
+            if neighbour in seen:
+                continue
+            if forward:
+                seen[neighbour] = (node, move)
+            else:
+                # walking backwards: the move is from neighbour to node
+                seen[neighbour] = (node, _reverse(move))
+            if neighbour in other:
+                return nxt, neighbour
+            nxt.append(neighbour)
+    return nxt, None
+
+
+def _reverse(move):
+    return {'U': 'D', 'D': 'U'}.get(move, move)
+
+
+def describe(moves, gender=None):
+    """
+    Label the person at the end of `moves` relative to the person at the
+    start, e.g. 'UUD' -> 'uncle' / 'aunt'.
+    """
+    steps = ''.join(moves).replace('B', 'UD')
+    # child's other parent: treat as a partner
+    while 'DU' in steps:
+        steps = steps.replace('DU', 'S', 1)
+
+    match = PATTERN.match(steps)
+    if not match:
+        return 'relative by marriage'
+
+    lead, ups, downs, trail = match.groups()
+    m, n = len(ups), len(downs)
+
+    if not lead and not trail:
+        return blood_label(m, n, gender)
+
+    if lead and trail:
+        if (m, n) == (1, 1):
+            return _word('sibling', gender) + '-in-law'
+        return 'relative by marriage'
+
+    if lead:
+        # a blood relative of the starting person's spouse
+        if (m, n) == (0, 0):
+            return _word('spouse', gender)
+        if (m, n) == (1, 0):
+            return _word('parent', gender) + '-in-law'
+        if (m, n) == (1, 1):
+            return _word('sibling', gender) + '-in-law'
+        if m == 0:
+            return 'step' + blood_label(0, n, gender)
+        return "spouse's " + blood_label(m, n, gender)
+
+    # the spouse of one of the starting person's blood relatives
+    if (m, n) == (1, 0):
+        return 'step' + _word('parent', gender)
+    if (m, n) == (0, 1):
+        return _word('child', gender) + '-in-law'
+    if (m, n) == (1, 1):
+        return _word('sibling', gender) + '-in-law'
+    if n == 1 and m >= 2:
+        return blood_label(m, n, gender) + ' by marriage'
+    return blood_label(m, n, None) + "'s " + _word('spouse', gender)
+
+
+def blood_label(m, n, gender=None):
+    """Label for a relative reached by `m` steps up then `n` steps down."""
+    if m == 0 and n == 0:
+        return _word('self', gender)
+    if n == 0:
+        return _lineal(m, 'parent', gender)
+    if m == 0:
+        return _lineal(n, 'child', gender)
+    if m == 1 and n == 1:
+        return _word('sibling', gender)
+    if n == 1:
+        return _greats(m - 2) + _word('pibling', gender)
+    if m == 1:
+        return _greats(n - 2) + _word('nibling', gender)
+
+    degree = min(m, n) - 1
+    removed = abs(m - n)
+    label = _ordinal(degree) + ' cousin'
+    if removed:
+        label += ' ' + REMOVED.get(removed, f'{removed} times') + ' removed'
+    return label
+
+
+def _lineal(steps, base, gender):
+    word = _word(base, gender)
+    if steps == 1:
+        return word
+    return _greats(steps - 2) + 'grand' + word
+
+
+def _greats(count):
+    return 'great-' * count
+
+
+def _ordinal(n):
+    return ORDINALS[n] if n < len(ORDINALS) else f'{n}th'
+
+
+def _word(key, gender):
+    male, female, neutral = WORDS[key]
+    gender = (gender or '').strip().lower()
+    if gender == 'male':
+        return male
+    if gender == 'female':
+        return female
+    return neutral
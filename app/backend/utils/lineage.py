@@ -0,0 +1,95 @@
+"""
+Ancestor / descendant traversal over the Relationships table.
+
+Relationships are stored as "person1 is <type> of person2", so a parent
+edge points from person1 (parent) to person2 (child).
+"""
+
+PERSON_COLUMNS = """
+    p.id, p.given_name, p.family_name, p.photo, p.gender,
+    p.birth_date, p.death_date
+"""
+
+
+def _placeholders(values):
+    return ', '.join('?' for _ in values)
+
+
+def fetch_lineage(conn, person_id, user_id, depth, parent_types,
+                  spouse_types=None, direction='ancestors'):
+    """
+    Return People rows reachable from `person_id` via parent edges, each
+    tagged with the generation at which it was first reached.
+
+    The recursive CTE uses UNION over (id, generation), so a cycle in bad
+    data can only revisit a person once per generation and the walk is
+    bounded by `depth`. Deleted people and people belonging to another
+    user stop the walk.
+
+    If `spouse_types` is given, spouses of every person found (including
+    the root) are added at the same generation with is_spouse = 1.
+    """
+    if direction == 'ancestors':
+        next_col, from_col = 'person1_id', 'person2_id'
+    else:
+        next_col, from_col = 'person2_id', 'person1_id'
+
+    params = [person_id, *parent_types, user_id, depth]
+    sql = f"""
+        WITH RECURSIVE lineage(id, generation) AS (
+            SELECT ?, 0
+            UNION
+            SELECT r.{next_col}, l.generation + 1
+            FROM lineage l
+            JOIN Relationships r
+              ON r.{from_col} = l.id
+             AND r.type IN ({_placeholders(parent_types)})
+            JOIN People np
+              ON np.id = r.{next_col}
+             AND np.user_id = ?
+             AND np.is_deleted = 0
+            WHERE l.generation < ?
+        )
+    """
+
+    if spouse_types:
+        params += [*spouse_types, *spouse_types]
+        sql += f""",
+        found(id, generation, is_spouse) AS (
+            SELECT id, generation, 0 FROM lineage
+            UNION ALL
+            SELECT r.person2_id, l.generation, 1
+            FROM lineage l
+            JOIN Relationships r
+              ON r.person1_id = l.id
+             AND r.type IN ({_placeholders(spouse_types)})
+            UNION ALL
+            SELECT r.person1_id, l.generation, 1
+            FROM lineage l
+            JOIN Relationships r
+              ON r.person2_id = l.id
+             AND r.type IN ({_placeholders(spouse_types)})
+        )
+        """
+    else:
+        sql += """,
+        found(id, generation, is_spouse) AS (
+            SELECT id, generation, 0 FROM lineage
+        )
+        """
+
+    params += [person_id, user_id]
+    sql += f"""
+        SELECT {PERSON_COLUMNS},
+               MIN(f.generation) AS generation,
+               MIN(f.is_spouse) AS is_spouse
+        FROM found f
+        JOIN People p ON p.id = f.id
+        WHERE f.id != ?
+          AND p.user_id = ?
+          AND p.is_deleted = 0
+        GROUP BY p.id
+        ORDER BY generation, p.family_name, p.given_name
+    """
+
+    return conn.execute(sql, params).fetchall()
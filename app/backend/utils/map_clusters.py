@@ -0,0 +1,183 @@
+"""
+Server-side point clustering for the map view.
+
+Points are bucketed into a square grid in Web Mercator space: every
+z/x/y map tile is split into `cells` x `cells` cells, so a cluster is
+the same on screen size at every zoom. Clusters are computed one tile
+at a time from the R*Tree indexes (the stored float32 point is precise
+enough for bucketing); the base row is only looked up by id to check
+its owner exactly, since the float32 user dimension cannot tell ids
+above 2**24 apart. Tiles are cached per (user, data version, zoom,
+tile): panning reuses every tile already seen, and any write to the
+tree changes the version and orphans the old entries.
+"""
+import heapq
+import math
+import threading
+from collections import OrderedDict
+
+MAX_MERCATOR_LAT = 85.05112878
+
+# Widen each tile query slightly so a point on a tile edge is always
+# fetched by the tile its cell index assigns it to
+EDGE_EPSILON = 1e-7
+
+# kind -> query over its R*Tree; min_* == max_* up to float32 rounding.
+# CROSS JOIN keeps the R*Tree as the outer loop (see utils/geo).
+TILE_SQL = {
+    'people': """
+        SELECT gi.id, gi.min_lat, gi.min_lng
+        FROM People_geo gi
+        CROSS JOIN People p ON p.id = gi.id
+        WHERE gi.min_user <= ? AND gi.max_user >= ?
+          AND gi.max_lat >= ? AND gi.min_lat <= ?
+          AND gi.max_lng >= ? AND gi.min_lng <= ?
+          AND p.user_id = ? AND p.is_deleted = 0
+    """,
+    'events': """
+        SELECT gi.id, gi.min_lat, gi.min_lng
+        FROM Events_geo gi
+        CROSS JOIN Events e ON e.id = gi.id
+        WHERE gi.min_user <= ? AND gi.max_user >= ?
+          AND gi.max_lat >= ? AND gi.min_lat <= ?
+          AND gi.max_lng >= ? AND gi.min_lng <= ?
+          AND e.user_id = ?
+    """,
+}
+
+
+def _mercator_y(lat):
+    """Latitude -> 0..1 from north to south."""
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    rad = math.radians(lat)
+    return (1 - math.log(math.tan(rad) + 1 / math.cos(rad)) / math.pi) / 2
+
+
+def _tile_lat(y, n):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+
+def tile_bounds(z, x, y):
+    """(south, west, north, east) of tile z/x/y."""
+    n = 1 << z
+    return _tile_lat(y + 1, n), x / n * 360 - 180, _tile_lat(y, n), (x + 1) / n * 360 - 180
+
+
+def tiles_for_bbox(bbox, z):
+    """[(x, y)] of the tiles at zoom `z` covering (south, west, north, east)."""
+    south, west, north, east = bbox
+    n = 1 << z
+    y0 = min(n - 1, int(_mercator_y(north) * n))
+    y1 = min(n - 1, int(_mercator_y(south) * n))
+    x0 = min(n - 1, int((west + 180) / 360 * n))
+    x1 = min(n - 1, int((east + 180) / 360 * n))
+    xs = list(range(x0, x1 + 1)) if x0 <= x1 else list(range(x0, n)) + list(range(0, x1 + 1))
+    return [(x, y) for y in range(y0, y1 + 1) for x in xs]
+
+
+def tile_clusters(conn, user_id, kinds, z, tx, ty, cells, representatives=3):
+    """Clusters for one tile: a list of dicts, one per non-empty cell."""
+    south, west, north, east = tile_bounds(z, tx, ty)
+    if ty == 0:
+        north = 90.0
+    if ty == (1 << z) - 1:
+        south = -90.0
+    n = (1 << z) * cells
+    cx0, cy0 = tx * cells, ty * cells
+
+    buckets = {}
+    for kind in kinds:
+        params = (
+            user_id, user_id,
+            south - EDGE_EPSILON, north + EDGE_EPSILON,
+            west - EDGE_EPSILON, east + EDGE_EPSILON,
+            user_id
+        )
+        for point_id, lat, lng in conn.execute(TILE_SQL[kind], params):
+            cx = min(n - 1, int((lng + 180) / 360 * n)) - cx0
+            cy = min(n - 1, int(_mercator_y(lat) * n)) - cy0
+            # R*Tree matches are inclusive; keep each point in exactly one tile
+            if not (0 <= cx < cells and 0 <= cy < cells):
+                continue
+            bucket = buckets.get((cx, cy))
+            if bucket is None:
+                bucket = buckets[(cx, cy)] = {
+                    'count': 0, 'lat': 0.0, 'lng': 0.0,
+                    'counts': dict.fromkeys(kinds, 0),
+                    'ids': {k: [] for k in kinds}
+                }
+            bucket['count'] += 1
+            bucket['lat'] += lat
+            bucket['lng'] += lng
+            bucket['counts'][kind] += 1
+            bucket['ids'][kind].append(point_id)
+
+    clusters = []
+    for (cx, cy), bucket in sorted(buckets.items()):
+        count = bucket['count']
+        clusters.append({
+            'cell': f'{z}/{cx0 + cx}/{cy0 + cy}',
+            'lat': round(bucket['lat'] / count, 6),
+            'lng': round(bucket['lng'] / count, 6),
+            'count': count,
+            'counts': bucket['counts'],
+            'ids': {k: heapq.nsmallest(representatives, ids) for k, ids in bucket['ids'].items()}
+        })
+    return clusters
+
+
+class ClusterCache:
+    """Per-process LRU of tile clusters."""
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def get_cluster_cache(app):
+    cache = app.extensions.get('map_cluster_cache')
+    if cache is None:
+        cache = ClusterCache(app.config.get('MAP_CLUSTER_CACHE_SIZE', 2048))
+        app.extensions['map_cluster_cache'] = cache
+    return cache
+
+
+def clusters_for_bbox(conn, cache, user_id, version, kinds, bbox, z, cells, representatives=3):
+    clusters = []
+    for tx, ty in tiles_for_bbox(bbox, z):
+        key = (user_id, version, z, tx, ty, cells, tuple(kinds))
+        tile = cache.get(key)
+        if tile is None:
+            tile = tile_clusters(conn, user_id, kinds, z, tx, ty, cells, representatives)
+            cache.put(key, tile)
+        clusters.extend(tile)
+    return clusters
@@ -0,0 +1,210 @@
+"""
+Request metrics in Prometheus text format (GET /api/metrics).
+
+Per (blueprint, endpoint, method) the registry keeps a latency
+histogram, a response size histogram, request counts by status, and
+the number of SQL statements and seconds spent in SQL (counted by
+database.TimedConnection). Recording a request is a few dict updates
+under a lock; the text is only built when something scrapes.
+
+The numbers are per process, like the /api/health stats: under gunicorn
+each worker reports its own requests.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PREFIX = 'familytree'
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointMetrics:
+    __slots__ = ('latency', 'size', 'statuses', 'sql_statements', 'sql_seconds')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.in_flight = 0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, key, status, seconds, size, sql_statements, sql_seconds):
+        with self._lock:
+            self.in_flight -= 1
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = EndpointMetrics()
+            metrics.latency.observe(seconds)
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.sql_statements += sql_statements
+            metrics.sql_seconds += sql_seconds
+
+    def _histogram(self, out, name, help_text, attr, endpoints):
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} histogram')
+        for (blueprint, endpoint, method), metrics in endpoints:
+            hist = getattr(metrics, attr)
+            labels = dict(blueprint=blueprint, endpoint=endpoint, method=method)
+            cumulative = 0
+            for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                cumulative += count
+                out.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+            out.append(f'{name}_sum{_labels(**labels)} {_number(hist.sum)}')
+            out.append(f'{name}_count{_labels(**labels)} {hist.count}')
+
+    def render(self, components=None):
+        """
+        Prometheus text exposition. `components` is {name: stats dict}
+        (the /api/health stats); their numeric values become gauges.
+        """
+        with self._lock:
+            endpoints = sorted(
+                (key, _snapshot(metrics)) for key, metrics in self._endpoints.items()
+            )
+            in_flight = self.in_flight
+
+        out = [
+            f'# HELP {PREFIX}_http_requests_in_flight Requests being served.',
+            f'# TYPE {PREFIX}_http_requests_in_flight gauge',
+            f'{PREFIX}_http_requests_in_flight {in_flight}',
+            f'# HELP {PREFIX}_http_requests_total Requests served, by status.',
+            f'# TYPE {PREFIX}_http_requests_total counter',
+        ]
+        for (blueprint, endpoint, method), metrics in endpoints:
+            for status, count in sorted(metrics.statuses.items()):
+                labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method, status=status)
+                out.append(f'{PREFIX}_http_requests_total{labels} {count}')
+
+        self._histogram(out, f'{PREFIX}_http_request_duration_seconds',
+                        'Time to serve a request.', 'latency', endpoints)
+        self._histogram(out, f'{PREFIX}_http_response_size_bytes',
+                        'Response body size as sent.', 'size', endpoints)
+
+        for name, attr, help_text in (
+            ('sql_statements_total', 'sql_statements', 'SQL statements executed.'),
+            ('sql_seconds_total', 'sql_seconds', 'Seconds spent executing SQL.'),
+        ):
+            out.append(f'# HELP {PREFIX}_{name} {help_text}')
+            out.append(f'# TYPE {PREFIX}_{name} counter')
+            for (blueprint, endpoint, method), metrics in endpoints:
+                labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method)
+                out.append(f'{PREFIX}_{name}{labels} {_number(getattr(metrics, attr))}')
+
+        if components:
+            out.append(f'# HELP {PREFIX}_component_stat Internal component stats (see /api/health).')
+            out.append(f'# TYPE {PREFIX}_component_stat gauge')
+            for component, stats in sorted(components.items()):
+                for stat, value in sorted((stats or {}).items()):
+                    if isinstance(value, (int, float)):
+                        labels = _labels(component=component, stat=stat)
+                        out.append(f'{PREFIX}_component_stat{labels} {_number(value)}')
+
+        return '\n'.join(out) + '\n'
+
+
+def _snapshot(metrics):
+    copy = EndpointMetrics()
+    for attr in ('latency', 'size'):
+        hist, snap = getattr(metrics, attr), getattr(copy, attr)
+        snap.counts, snap.sum, snap.count = list(hist.counts), hist.sum, hist.count
+    copy.statuses = dict(metrics.statuses)
+    copy.sql_statements = metrics.sql_statements
+    copy.sql_seconds = metrics.sql_seconds
+    return copy
+
+
+def get_metrics(app):
+    registry = app.extensions.get('metrics')
+    if registry is None:
+        registry = MetricsRegistry()
+        app.extensions['metrics'] = registry
+    return registry
+
+
+def _before_request():
+    g._metrics_request = request._get_current_object()
+    g._metrics_started = time.perf_counter()
+    get_metrics(current_app).started()
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    g._metrics_size = None if response.is_streamed else response.calculate_content_length()
+    return response
+
+
+def _teardown_request(exception=None):
+    # Nested request contexts (operations of /api/batch) share g and are
+    # accounted to the request that started them
+    if g.get('_metrics_request') is not request._get_current_object():
+        return
+    g.pop('_metrics_request')
+
+    seconds = time.perf_counter() - g.pop('_metrics_started')
+    conn = g.get('_sqlite_conn')
+    statements, sql_seconds = conn.take_sql_counters() if conn is not None else (0, 0.0)
+    key = (request.blueprint or '', request.endpoint or 'unmatched', request.method)
+    get_metrics(current_app).finished(
+        key, g.get('_metrics_status', 500), seconds, g.get('_metrics_size'),
+        statements, sql_seconds
+    )
+
+
+def init_metrics(app):
+    """
+    Record every request of `app`. Register before other after_request
+    hooks (they run in reverse order) so sizes are taken as sent.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    get_metrics(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
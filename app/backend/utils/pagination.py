@@ -0,0 +1,67 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url'd so clients treat it as opaque.
+"""
+import base64
+import json
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor into a list of `size` sort-key values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError('Invalid cursor')
+    # Values are bound as SQL parameters, which must be scalars
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def get_page_args(args, key_size, default_limit, max_limit):
+    """
+    Read `limit` / `cursor` from the query string.
+
+    Returns None when neither is given (caller returns the full list),
+    otherwise (limit, cursor_values_or_None).
+    """
+    if 'limit' not in args and 'cursor' not in args:
+        return None
+
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1 or limit > max_limit:
+        raise PaginationError(f'limit must be between 1 and {max_limit}')
+
+    cursor = args.get('cursor')
+    values = decode_cursor(cursor, key_size) if cursor else None
+    return limit, values
+
+
+def page_response(rows, limit, key):
+    """
+    Split a `limit + 1` row fetch into (data, next_cursor); `key` maps a
+    row to its sort key.
+    """
+    data = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(key(rows[limit - 1]))
+    return data, next_cursor
@@ -0,0 +1,250 @@
+"""
+Password hashing with versioned hash strings and a bounded KDF pool.
+
+Stored hashes name their algorithm and cost so parameters can change
+without a migration:
+
+    scrypt$n=16384,r=8,p=1$<salt b64>$<hash b64>
+    <64 hex chars>                       legacy unsalted SHA-256
+
+Verification accepts every known format; `needs_rehash` tells login to
+re-hash with the current hasher once the plaintext is in hand.
+
+scrypt is deliberately slow and memory-hungry, so it runs on a small
+per-process thread pool (hashlib releases the GIL while it works). A
+semaphore caps queued + running KDF calls; when a login storm fills it,
+callers get KdfBusy immediately instead of tying up every worker.
+
+Throughput at a given cost (run from app/):
+
+    python -m backend.utils.passwords --n 16384 --workers 2 --seconds 5
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app
+
+
+class KdfBusy(Exception):
+    """The KDF queue is full; the caller should answer 503."""
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class Sha256Hasher:
+    """Legacy format (bare hex digest). Verify-only; never used for new hashes."""
+
+    algorithm = 'sha256'
+
+    def identify(self, stored):
+        return len(stored) == 64 and '$' not in stored
+
+    def verify(self, password, stored):
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(digest, stored)
+
+    def needs_rehash(self, stored):
+        return True
+
+
+class ScryptHasher:
+
+    algorithm = 'scrypt'
+
+    def __init__(self, n=2 ** 14, r=8, p=1, dklen=32, salt_bytes=16):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.dklen = dklen
+        self.salt_bytes = salt_bytes
+
+    def identify(self, stored):
+        return stored.startswith('scrypt$')
+
+    def _derive(self, password, salt, n, r, p, dklen):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, dklen=dklen,
+            maxmem=256 * n * r * p
+        )
+
+    def hash(self, password):
+        salt = secrets.token_bytes(self.salt_bytes)
+        key = self._derive(password, salt, self.n, self.r, self.p, self.dklen)
+        params = f'n={self.n},r={self.r},p={self.p}'
+        return f'scrypt${params}${_b64encode(salt)}${_b64encode(key)}'
+
+    def _parse(self, stored):
+        _, params, salt, key = stored.split('$')
+        values = dict(item.split('=') for item in params.split(','))
+        return (
+            int(values['n']), int(values['r']), int(values['p']),
+            _b64decode(salt), _b64decode(key)
+        )
+
+    def verify(self, password, stored):
+        try:
+            n, r, p, salt, key = self._parse(stored)
+        except (ValueError, KeyError):
+            return False
+        candidate = self._derive(password, salt, n, r, p, len(key))
+        return hmac.compare_digest(candidate, key)
+
+    def needs_rehash(self, stored):
+        try:
+            n, r, p, _, key = self._parse(stored)
+        except (ValueError, KeyError):
+            return True
+        return (n, r, p, len(key)) != (self.n, self.r, self.p, self.dklen)
+
+
+class PasswordHasher:
+    """
+    The current hasher plus the legacy ones it can still verify. Runs
+    every KDF call through a bounded thread pool.
+    """
+
+    def __init__(self, current, legacy=(), workers=2, max_pending=32, timeout=10.0):
+        self.pid = os.getpid()
+        self.current = current
+        self.hashers = [current, *legacy]
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='kdf'
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.seconds = 0.0
+        # Verified against when the username does not exist, so a miss
+        # costs the same as a wrong password.
+        self._dummy_hash = current.hash(secrets.token_urlsafe(16))
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise KdfBusy('Too many concurrent password checks, try again shortly')
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.completed += 1
+                    self.seconds += elapsed
+                self._slots.release()
+
+        try:
+            return self._executor.submit(task).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise KdfBusy('Password check timed out, try again shortly')
+
+    def _hasher_for(self, stored):
+        for hasher in self.hashers:
+            if hasher.identify(stored):
+                return hasher
+        return None
+
+    def hash(self, password):
+        return self._run(self.current.hash, password)
+
+    def verify(self, password, stored):
+        """
+        Return (ok, new_hash). `new_hash` is set when the password was
+        right but `stored` uses an outdated algorithm or cost.
+        """
+        hasher = self._hasher_for(stored) if stored else None
+        if hasher is None:
+            self._run(self.current.verify, password, self._dummy_hash)
+            return False, None
+
+        if not self._run(hasher.verify, password, stored):
+            return False, None
+        if hasher is self.current and not hasher.needs_rehash(stored):
+            return True, None
+        return True, self._run(self.current.hash, password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_ms': round(1000 * self.seconds / self.completed, 1) if self.completed else None
+            }
+
+
+def get_password_hasher():
+    """Return this process's PasswordHasher, creating it on first use."""
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None or hasher.pid != os.getpid():
+        config = current_app.config
+        hasher = PasswordHasher(
+            ScryptHasher(
+                n=config.get('SCRYPT_N', 2 ** 14),
+                r=config.get('SCRYPT_R', 8),
+                p=config.get('SCRYPT_P', 1)
+            ),
+            legacy=[Sha256Hasher()],
+            workers=config.get('KDF_WORKERS', 2),
+            max_pending=config.get('KDF_MAX_PENDING', 32),
+            timeout=config.get('KDF_TIMEOUT', 10.0)
+        )
+        current_app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def benchmark(n=2 ** 14, r=8, p=1, workers=2, seconds=5.0):
+    """Logins (scrypt verifications) per second at the given cost."""
+    hasher = PasswordHasher(ScryptHasher(n=n, r=r, p=p), workers=workers, max_pending=workers * 4)
+    stored = hasher.current.hash('correct horse battery staple')
+    clients = ThreadPoolExecutor(max_workers=workers * 4)
+
+    def client(deadline):
+        done = 0
+        while time.perf_counter() < deadline:
+            try:
+                hasher.verify('correct horse battery staple', stored)
+                done += 1
+            except KdfBusy:
+                time.sleep(0.001)
+        return done
+
+    started = time.perf_counter()
+    deadline = started + seconds
+    total = sum(clients.map(client, [deadline] * (workers * 4)))
+    elapsed = time.perf_counter() - started
+    return {
+        'n': n, 'r': r, 'p': p, 'workers': workers,
+        'logins': total,
+        'logins_per_second': round(total / elapsed, 1),
+        **hasher.stats()
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Benchmark login throughput for a scrypt cost.')
+    parser.add_argument('--n', type=int, default=2 ** 14)
+    parser.add_argument('--r', type=int, default=8)
+    parser.add_argument('--p', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.n, args.r, args.p, args.workers, args.seconds)))
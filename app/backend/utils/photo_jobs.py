@@ -0,0 +1,93 @@
+"""
+Bounded background processing for photo uploads.
+
+Uploads are decoded/resized/encoded on a small thread pool instead of in
+the request. A semaphore caps queued + running jobs so a burst of photos
+is rejected early rather than piling up behind the API's own work.
+Job status lives in the PhotoJobs table so any worker can report it.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from ..database import get_db_connection
+
+
+class PhotoProcessor:
+
+    def __init__(self, workers=2, max_pending=16):
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='photo'
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def try_reserve(self):
+        """Reserve a queue slot; False when the queue is full."""
+        return self._slots.acquire(blocking=False)
+
+    def cancel_reservation(self):
+        self._slots.release()
+
+    def submit(self, app, job_id, process, *args):
+        """
+        Run `process(conn, job_id, *args)` on the pool inside an app
+        context. The caller must hold a reservation from try_reserve().
+        """
+        self._executor.submit(self._run, app, job_id, process, args)
+
+    def _run(self, app, job_id, process, args):
+        try:
+            with app.app_context():
+                conn = get_db_connection()
+                set_job_status(conn, job_id, 'processing')
+                try:
+                    process(conn, job_id, *args)
+                except Exception as e:
+                    conn.rollback()
+                    if not isinstance(e, ValueError):
+                        app.logger.exception("Photo job %s failed", job_id)
+                    set_job_status(conn, job_id, 'failed', error=str(e))
+        finally:
+            self._slots.release()
+
+
+def get_photo_processor():
+    """Return this process's PhotoProcessor, creating it on first use."""
+    processor = current_app.extensions.get('photo_processor')
+    if processor is None or processor.pid != os.getpid():
+        processor = PhotoProcessor(
+            workers=current_app.config.get('PHOTO_WORKERS', 2),
+            max_pending=current_app.config.get('PHOTO_MAX_PENDING', 16)
+        )
+        current_app.extensions['photo_processor'] = processor
+    return processor
+
+
+def create_job(conn, person_id, user_id):
+    """Insert a pending job; `person_id` is None for a user's profile photo."""
+    now = datetime.now().isoformat()
+    cur = conn.execute(
+        """
+        INSERT INTO PhotoJobs (person_id, user_id, status, created_at, updated_at)
+        VALUES (?, ?, 'pending', ?, ?)
+        """,
+        (person_id, user_id, now, now)
+    )
+    conn.commit()
+    return cur.lastrowid
+
+
+def set_job_status(conn, job_id, status, photo=None, error=None):
+    conn.execute(
+        """
+        UPDATE PhotoJobs
+        SET status = ?, photo = COALESCE(?, photo), error = ?, updated_at = ?
+        WHERE id = ?
+        """,
+        (status, photo, error, datetime.now().isoformat(), job_id)
+    )
+    conn.commit()
@@ -0,0 +1,248 @@
+"""
+Response encoding: faster JSON, optional MessagePack, and compression.
+
+FastJSONProvider replaces Flask's JSON provider, so every `jsonify`
+goes through it:
+
+* with orjson installed, JSON is serialized by orjson (same output as
+  the stdlib encoder: sorted keys, Flask's handling of dates and other
+  non-JSON types); without it the stdlib encoder is used as before;
+* with msgpack installed, a client sending `Accept: application/msgpack`
+  gets the same object as MessagePack.
+
+compress_response runs after every request and gzip- or
+brotli-compresses (brotli only if installed) bodies of at least
+COMPRESS_MIN_SIZE bytes, honouring Accept-Encoding. Streamed responses,
+files and anything already encoded are left alone.
+
+All three libraries are optional; `python -m backend.utils.response_encoding`
+measures what each one costs on the people and relationship lists.
+"""
+import gzip
+import time
+
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/msgpack', 'application/x-ndjson',
+    'application/javascript', 'text/javascript', 'text/css', 'text/html',
+    'text/plain', 'image/svg+xml', 'text/vnd.familysearch.gedcom',
+}
+
+
+def add_vary(response):
+    """
+    Vary headers of a negotiated body, for responses that stand in for
+    one (304s) as well as the body itself.
+    """
+    if msgpack is not None:
+        response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+
+
+def wants_msgpack():
+    if msgpack is None or not has_request_context():
+        return False
+    best = request.accept_mimetypes.best_match(['application/json', *MSGPACK_MIMETYPES])
+    return best in MSGPACK_MIMETYPES
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider backed by orjson / msgpack where available."""
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _pretty(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default), mimetype=MSGPACK_MIMETYPES[0]
+            )
+        elif orjson is not None and not self._pretty():
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options())
+            response = self._app.response_class(body + b'\n', mimetype=self.mimetype)
+        else:
+            response = super().response(obj)
+
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+
+def _choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings.quality('br') > 0:
+        return 'br'
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+
+def compress_response(response):
+    """after_request hook: compress the body if the client accepts it."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    # Small bodies are sent as is, but a cache must still key them by
+    # Accept-Encoding: the same URL may be compressed once it grows
+    response.vary.add('Accept-Encoding')
+    config = current_app.config
+    data = response.get_data()
+    if len(data) < config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    # A strong validator names exact bytes, which just changed
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_response_encoding(app):
+    """Install the JSON provider and the compression hook on `app`."""
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+
+
+def benchmark(people=20000, repeat=5):
+    """
+    Per-endpoint cost of each serializer and compressor on the
+    GET /api/people and GET /api/relationships lists of a seeded tree.
+    """
+    import json
+    import os
+    import tempfile
+    from datetime import datetime
+
+    from .. import create_app
+    from ..config import Config
+
+    class BenchConfig(Config):
+        DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        SESSION_SWEEP_INTERVAL = 0
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    client.post('/api/auth/register', json={'username': 'bench', 'password': 'benchmark', 'email': 'bench@example.com'})
+    token = client.post('/api/auth/login', json={'username': 'bench', 'password': 'benchmark'}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'identity'}
+
+    with app.app_context():
+        from ..database import get_db_connection
+        conn = get_db_connection()
+        user_id = conn.execute("SELECT id FROM Users WHERE username = 'bench'").fetchone()[0]
+        now = datetime.now().isoformat()
+        conn.executemany(
+            """
+            INSERT INTO People (given_name, family_name, gender, birth_date, birth_place,
+                                bio, created_at, updated_at, is_deleted, user_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+            """,
+            [
+                (f'Given{i}', f'Family{i % 500}', 'male' if i % 2 else 'female',
+                 f'{1800 + i % 200}-01-01', 'Pune', 'Lorem ipsum ' * (i % 8), now, now, user_id)
+                for i in range(people)
+            ]
+        )
+        first = conn.execute("SELECT MIN(id) FROM People WHERE user_id = ?", (user_id,)).fetchone()[0]
+        conn.executemany(
+            """
+            INSERT INTO Relationships (person1_id, person2_id, type, created_at, updated_at, user_id)
+            VALUES (?, ?, 'father', ?, ?, ?)
+            """,
+            [(first + i // 2, first + i, now, now, user_id) for i in range(1, people)]
+        )
+        conn.commit()
+
+    def timed(fn):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, round(best * 1000, 2)
+
+    results = {}
+    for path in ('/api/people', '/api/relationships'):
+        obj = client.get(path, headers=headers).get_json()
+        encoders = {'json': lambda: json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()}
+        if orjson is not None:
+            encoders['orjson'] = lambda: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        if msgpack is not None:
+            encoders['msgpack'] = lambda: msgpack.packb(obj)
+
+        endpoint = {'rows': len(obj['data'])}
+        for name, encode in encoders.items():
+            body, ms = timed(encode)
+            endpoint[name] = {'bytes': len(body), 'ms': ms}
+            for encoding in ('gzip', 'br') if brotli is not None else ('gzip',):
+                packed, cms = timed(lambda: compress(body, encoding, app.config))
+                endpoint[f'{name}+{encoding}'] = {'bytes': len(packed), 'ms': round(ms + cms, 2)}
+
+        for label, extra in (('request_identity', {}), ('request_negotiated', {'Accept-Encoding': 'gzip, br'})):
+            response, ms = timed(lambda: client.get(path, headers={**headers, **extra}))
+            endpoint[label] = {'bytes': len(response.data), 'ms': ms,
+                               'encoding': response.headers.get('Content-Encoding')}
+        results[path] = endpoint
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Benchmark response serialization and compression.')
+    parser.add_argument('--people', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.people, args.repeat), indent=2))
@@ -0,0 +1,21 @@
+import re
+
+# bm25 column weights for People_fts:
+# given_name, family_name, other_names, birth_place, bio
+PEOPLE_FTS_WEIGHTS = (10.0, 10.0, 5.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so user input can never be
+    parsed as FTS5 syntax; terms are implicitly ANDed. Returns None when
+    there is nothing searchable.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{t}"*' for t in tokens)
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+def hash_token(token: str) -> str:
+    """Hash a session token so raw tokens never sit in process memory as keys."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionCache:
+    """
+    Bounded LRU + TTL cache of authenticated users, keyed by token hash.
+
+    Entries expire at whichever comes first: the cache TTL or the session's
+    own expires_at. The cache is per process, so the TTL also bounds how long
+    another gunicorn worker may keep serving a session that was revoked here.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user, deadline = entry
+            if deadline <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(user)
+
+    def put(self, token, user, expires_at):
+        """Cache `user` for `token`; `expires_at` is the session's ISO expiry."""
+        deadline = time.time() + self.ttl
+        if expires_at:
+            try:
+                deadline = min(deadline, datetime.fromisoformat(expires_at).timestamp())
+            except (TypeError, ValueError):
+                pass
+
+        key = hash_token(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (dict(user), deadline)
+            self._by_user.setdefault(user['id'], set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_token(self, token):
+        with self._lock:
+            self._remove(hash_token(token))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0]['id']
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
@@ -0,0 +1,130 @@
+"""
+Background purge of expired Sessions rows.
+
+Each sweep deletes expired rows in small batches, committing between
+them, so the write lock is never held for more than one batch. One
+sweeper thread runs per process; with several workers the sweeps simply
+overlap harmlessly (a batch that finds nothing is a no-op index probe).
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from ..database import get_db_connection
+
+_sweeper_lock = threading.Lock()
+
+
+def purge_expired_sessions(conn, now=None, batch_size=500, pause=0.05):
+    """Delete sessions with expires_at <= now; returns the number removed."""
+    now = now or datetime.now().isoformat()
+    purged = 0
+    while True:
+        cur = conn.execute(
+            """
+            DELETE FROM Sessions
+            WHERE id IN (
+                SELECT id FROM Sessions
+                WHERE expires_at <= ?
+                LIMIT ?
+            )
+            """,
+            (now, batch_size)
+        )
+        conn.commit()
+        purged += cur.rowcount
+        if cur.rowcount < batch_size:
+            return purged
+        # Let queued writers in between batches
+        time.sleep(pause)
+
+
+class SessionSweeper:
+
+    def __init__(self, app, interval=300, batch_size=500, pause=0.05):
+        self.pid = os.getpid()
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0, 'purged_total': 0, 'errors': 0,
+            'last_run_at': None, 'last_purged': 0, 'last_duration_ms': None
+        }
+        self._thread = threading.Thread(
+            target=self._loop, name='session-sweeper', daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        # Spread workers that started together across the interval
+        if self._stop.wait(random.uniform(0, self.interval)):
+            return
+        while True:
+            self.sweep()
+            if self._stop.wait(self.interval):
+                return
+
+    def sweep(self):
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                purged = purge_expired_sessions(
+                    get_db_connection(), batch_size=self.batch_size, pause=self.pause
+                )
+        except Exception:
+            self.app.logger.exception("Session sweep failed")
+            with self._lock:
+                self._stats['errors'] += 1
+            return 0
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['purged_total'] += purged
+            self._stats['last_purged'] = purged
+            self._stats['last_run_at'] = datetime.now().isoformat()
+            self._stats['last_duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return purged
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'interval': self.interval}
+
+
+def get_session_sweeper(app):
+    """
+    Return this process's sweeper, starting it on first use (a sweeper
+    inherited across fork has no thread and is replaced). None when
+    SESSION_SWEEP_INTERVAL is 0.
+    """
+    interval = app.config.get('SESSION_SWEEP_INTERVAL', 300)
+    if not interval:
+        return None
+
+    sweeper = app.extensions.get('session_sweeper')
+    if sweeper is None or sweeper.pid != os.getpid():
+        with _sweeper_lock:
+            sweeper = app.extensions.get('session_sweeper')
+            if sweeper is None or sweeper.pid != os.getpid():
+                sweeper = SessionSweeper(
+                    app,
+                    interval=interval,
+                    batch_size=app.config.get('SESSION_SWEEP_BATCH_SIZE', 500)
+                )
+                sweeper.start()
+                app.extensions['session_sweeper'] = sweeper
+    return sweeper
+
+
+def init_session_sweeper(app):
+    """Start the sweeper lazily in each worker process on its first request."""
+    app.before_request(lambda: get_session_sweeper(app) and None)
@@ -0,0 +1,166 @@
+"""
+Per-request SQL tracing: slow-query log, EXPLAIN QUERY PLAN capture and
+N+1 detection.
+
+get_db_connection hands each request's connection a RequestTrace, which
+database.TimedConnection calls with (sql, parameters, seconds) as each
+statement completes; a query is timed until its last row is fetched, so
+a scan counts in full. Statements slower than SQL_SLOW_MS are logged
+with the route that ran them and their query plan; the plan is captured
+once per statement text and flags full table scans. In debug mode (or with
+SQL_DETECT_N_PLUS_ONE) a request that runs the same statement
+SQL_N_PLUS_ONE_THRESHOLD times or more is reported when it ends.
+
+Statements are traced as written (with ? placeholders), so bound values
+never reach the log.
+"""
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from flask import has_request_context, request
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+
+
+def _compact(sql):
+    return ' '.join(sql.split())
+
+
+def _route():
+    if not has_request_context():
+        return 'outside request'
+    return f'{request.method} {request.endpoint or request.path}'
+
+
+class SqlTracer:
+    """Per-process tracer settings, plan cache and counters."""
+
+    def __init__(self, logger, slow_ms=100.0, explain=True, n_plus_one_threshold=0,
+                 plan_cache_size=256):
+        self.logger = logger
+        self.slow_seconds = slow_ms / 1000 if slow_ms and slow_ms > 0 else None
+        self.explain = explain
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.plan_cache_size = plan_cache_size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'slow': 0, 'full_scans': 0, 'plans_captured': 0, 'n_plus_one': 0}
+
+    def start(self):
+        """A RequestTrace for a newly acquired connection, or None if idle."""
+        if self.slow_seconds is None and not self.n_plus_one_threshold:
+            return None
+        return RequestTrace(self, _route())
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def plan(self, conn, sql, parameters):
+        """EXPLAIN QUERY PLAN lines for `sql`, indented by depth; cached by text."""
+        with self._lock:
+            plan = self._plans.get(sql)
+            if plan is not None:
+                self._plans.move_to_end(sql)
+                return plan
+
+        try:
+            # The base class method bypasses TimedConnection, so this is not traced
+            rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+        except sqlite3.Error:
+            return None
+
+        depth = {0: -1}
+        plan = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            plan.append('  ' * depth[node_id] + detail)
+
+        with self._lock:
+            self._plans[sql] = plan
+            while len(self._plans) > self.plan_cache_size:
+                self._plans.popitem(last=False)
+            self._stats['plans_captured'] += 1
+        return plan
+
+    def slow(self, conn, route, sql, parameters, seconds):
+        self._count('slow')
+        plan = None
+        if self.explain and parameters is not None and sql.lstrip()[:7].upper().startswith(EXPLAINABLE):
+            plan = self.plan(conn, sql, parameters)
+
+        scans = []
+        for line in plan or ():
+            m = FULL_SCAN_RE.match(line.strip())
+            if m:
+                scans.append(m.group(1))
+        if scans:
+            self._count('full_scans')
+
+        self.logger.warning(
+            "Slow SQL (%.1f ms) in %s%s: %s%s",
+            seconds * 1000, route,
+            f" [full scan of {', '.join(scans)}]" if scans else '',
+            _compact(sql),
+            ''.join(f'\n    {line}' for line in plan) if plan else ''
+        )
+
+    def n_plus_one(self, route, sql, count):
+        self._count('n_plus_one')
+        self.logger.warning(
+            "Possible N+1 in %s: the same statement ran %d times: %s",
+            route, count, _compact(sql)
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'slow_ms': self.slow_seconds * 1000 if self.slow_seconds else None,
+                'n_plus_one_threshold': self.n_plus_one_threshold,
+                'plans_cached': len(self._plans)
+            }
+
+
+class RequestTrace:
+    """Statement hook for one request's connection."""
+
+    __slots__ = ('tracer', 'route', 'shapes')
+
+    def __init__(self, tracer, route):
+        self.tracer = tracer
+        self.route = route
+        self.shapes = {} if tracer.n_plus_one_threshold else None
+
+    def __call__(self, conn, sql, parameters, seconds):
+        if self.shapes is not None:
+            self.shapes[sql] = self.shapes.get(sql, 0) + 1
+        slow = self.tracer.slow_seconds
+        if slow is not None and seconds >= slow:
+            self.tracer.slow(conn, self.route, sql, parameters, seconds)
+
+    def finish(self):
+        if not self.shapes:
+            return
+        threshold = self.tracer.n_plus_one_threshold
+        for sql, count in self.shapes.items():
+            if count >= threshold:
+                self.tracer.n_plus_one(self.route, sql, count)
+
+
+def get_sql_tracer(app):
+    tracer = app.extensions.get('sql_tracer')
+    if tracer is None:
+        cfg = app.config
+        detect = app.debug or cfg.get('SQL_DETECT_N_PLUS_ONE', False)
+        tracer = SqlTracer(
+            app.logger,
+            slow_ms=cfg.get('SQL_SLOW_MS', 100.0),
+            explain=cfg.get('SQL_EXPLAIN_SLOW', True),
+            n_plus_one_threshold=cfg.get('SQL_N_PLUS_ONE_THRESHOLD', 20) if detect else 0
+        )
+        app.extensions['sql_tracer'] = tracer
+    return tracer
@@ -0,0 +1,170 @@
+"""
+Static file serving for the frontend bundle and user uploads.
+
+Frontend assets are scanned once into an in-memory manifest (path ->
+size, mtime, strong ETag, precompressed siblings), so a request is a
+dict lookup instead of filesystem probes. Files whose name carries a
+content hash (app.3f9c2a1b.js) are served as immutable.
+
+With an accel prefix configured, responses carry X-Accel-Redirect and no
+body, and nginx sends the bytes from its internal location.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+
+from flask import Response, request, send_file
+from werkzeug.security import safe_join
+
+# name.<hex hash>.ext, as emitted by most bundlers
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{8,}\.[A-Za-z0-9]+$')
+
+# Content-Encoding -> sibling suffix, in server preference order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_MAX_AGE = 31536000
+
+
+class Asset:
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'mimetype', 'immutable', 'encoded')
+
+    def __init__(self, path, size, mtime, etag, mimetype, immutable):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = etag
+        self.mimetype = mimetype
+        self.immutable = immutable
+        self.encoded = {}   # Content-Encoding -> sibling path
+
+
+class AssetManifest:
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.assets = {}
+        self.scan()
+
+    def scan(self):
+        assets = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            names = set(filenames)
+            for name in filenames:
+                if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+                st = os.stat(path)
+                asset = Asset(
+                    path, st.st_size, st.st_mtime, _file_etag(path),
+                    mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                    bool(HASHED_NAME_RE.search(name))
+                )
+                for encoding, suffix in ENCODINGS:
+                    if name + suffix in names:
+                        asset.encoded[encoding] = path + suffix
+                assets[rel] = asset
+        self.assets = assets
+
+    def get(self, path):
+        return self.assets.get(path)
+
+
+def _file_etag(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def get_asset_manifest(app):
+    manifest = app.extensions.get('asset_manifest')
+    if manifest is None:
+        manifest = AssetManifest(app.config['FRONTEND_DIR'])
+        app.extensions['asset_manifest'] = manifest
+    return manifest
+
+
+def _accel_path(prefix, root, path):
+    rel = os.path.relpath(path, root).replace(os.sep, '/')
+    return prefix.rstrip('/') + '/' + rel
+
+
+def _accel_response(location, mimetype):
+    # Empty body; nginx fills in the file and its Content-Length
+    response = Response(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = location
+    return response
+
+
+def serve_asset(manifest, asset, max_age, accel_prefix=None):
+    """Response for a manifest asset, honouring Accept-Encoding and If-None-Match."""
+    path, encoding = asset.path, None
+    for name, _ in ENCODINGS:
+        if name in asset.encoded and request.accept_encodings[name]:
+            path = asset.encoded[name]
+            encoding = name
+            break
+
+    # Strong validator per representation
+    etag = f'{asset.etag}-{encoding}' if encoding else asset.etag
+    if asset.immutable:
+        max_age = IMMUTABLE_MAX_AGE
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif accel_prefix:
+        response = _accel_response(_accel_path(accel_prefix, manifest.root, path), asset.mimetype)
+    else:
+        response = send_file(
+            path, mimetype=asset.mimetype, etag=False, conditional=True, max_age=max_age
+        )
+
+    response.set_etag(etag)
+    response.last_modified = asset.mtime
+    if asset.encoded:
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.content_encoding = encoding
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if asset.immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def serve_upload(root, filename, max_age, accel_prefix=None):
+    """
+    Response for a file under the uploads directory, or None if it does
+    not exist. A single stat() replaces the isfile() + send_from_directory
+    double check.
+    """
+    path = safe_join(root, filename)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    etag = f'{int(st.st_mtime_ns)}-{st.st_size}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif accel_prefix:
+        response = _accel_response(_accel_path(accel_prefix, root, path), mimetype)
+    else:
+        response = send_file(path, mimetype=mimetype, etag=False, conditional=True, max_age=max_age)
+
+    response.set_etag(etag)
+    response.last_modified = st.st_mtime
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
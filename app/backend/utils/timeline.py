@@ -0,0 +1,139 @@
+"""
+Unified timeline: births, deaths and events of one user in date order.
+
+Each source is a date-ordered query that walks its own index from the
+cursor; heapq.merge interleaves the three cursors lazily, so a page
+reads at most `limit + 1` rows from each source no matter how long the
+history is.
+
+Dates are ordered by their normalized lower bound (the *_jd_lo columns,
+see utils/dates.py); rows whose date text could not be normalized are
+left out. The sort key is (jd, source rank, id), which is also the page
+cursor.
+"""
+import heapq
+from itertools import islice
+
+from .dates import age_years
+
+# name -> (rank, SELECT ... yielding (jd, id, ...), date expression)
+# birth_lo/birth_hi and at_lo/at_hi feed the `age` field and are dropped
+SOURCES = {
+    'birth': (
+        0,
+        """
+        SELECT birth_jd_lo AS jd, birth_date AS date, id, id AS person_id,
+               given_name || ' ' || family_name AS person_name,
+               NULL AS title, birth_place AS place, birth_lat AS lat, birth_lng AS lng,
+               NULL AS birth_lo, NULL AS birth_hi, NULL AS at_lo, NULL AS at_hi
+        FROM People
+        WHERE user_id = ? AND is_deleted = 0 AND birth_jd_lo IS NOT NULL
+        """,
+        'birth_jd_lo'
+    ),
+    'death': (
+        1,
+        """
+        SELECT death_jd_lo AS jd, death_date AS date, id, id AS person_id,
+               given_name || ' ' || family_name AS person_name,
+               NULL AS title, NULL AS place, NULL AS lat, NULL AS lng,
+               birth_jd_lo AS birth_lo, birth_jd_hi AS birth_hi,
+               death_jd_lo AS at_lo, death_jd_hi AS at_hi
+        FROM People
+        WHERE user_id = ? AND is_deleted = 0 AND death_jd_lo IS NOT NULL
+        """,
+        'death_jd_lo'
+    ),
+    'event': (
+        2,
+        """
+        SELECT e.event_jd_lo AS jd, e.event_date AS date, e.id, e.created_by AS person_id,
+               p.given_name || ' ' || p.family_name AS person_name,
+               e.title, e.place, e.place_lat AS lat, e.place_lng AS lng,
+               p.birth_jd_lo AS birth_lo, p.birth_jd_hi AS birth_hi,
+               e.event_jd_lo AS at_lo, e.event_jd_hi AS at_hi
+        FROM Events e
+        LEFT JOIN People p ON e.created_by = p.id
+        WHERE e.user_id = ? AND IFNULL(e.event_jd_lo, -1) >= 0
+        """,
+        'IFNULL(e.event_jd_lo, -1)'
+    ),
+}
+RANKS = {rank: name for name, (rank, _, _) in SOURCES.items()}
+
+
+def valid_cursor(values):
+    """True if decoded cursor `values` is a (jd, rank, id) sort key."""
+    jd, rank, row_id = values
+    return (
+        all(type(v) is int for v in (jd, rank, row_id))
+        and rank in RANKS
+    )
+
+
+def _source_rows(conn, name, user_id, jd_from, jd_to, after, limit, batch_size):
+    rank, select, date_col = SOURCES[name]
+    id_col = 'e.id' if name == 'event' else 'id'
+    sql = select
+    params = [user_id]
+
+    if jd_from is not None:
+        sql += f" AND {date_col} >= ?"
+        params.append(jd_from)
+    if jd_to is not None:
+        sql += f" AND {date_col} <= ?"
+        params.append(jd_to)
+
+    if after:
+        after_jd, after_rank, after_id = after
+        if rank < after_rank:
+            sql += f" AND {date_col} > ?"
+            params.append(after_jd)
+        elif rank == after_rank:
+            sql += f" AND {date_col} >= ? AND ({date_col}, {id_col}) > (?, ?)"
+            params += [after_jd, after_jd, after_id]
+        else:
+            sql += f" AND {date_col} >= ?"
+            params.append(after_jd)
+
+    sql += f" ORDER BY {date_col}, {id_col} LIMIT ?"
+    params.append(limit)
+
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield (row['jd'], rank, row['id']), row
+
+
+def timeline_page(conn, user_id, limit, jd_from=None, jd_to=None, after=None, kinds=None):
+    """
+    Up to `limit` entries after the cursor `after` ((jd, rank, id) or
+    None), plus the cursor for the next page (None on the last page).
+    `jd_from` / `jd_to` bound the window in Julian Day Numbers.
+    """
+    names = kinds or list(SOURCES)
+    batch_size = min(limit + 1, 500)
+    merged = heapq.merge(
+        *(
+            _source_rows(conn, name, user_id, jd_from, jd_to, after, limit + 1, batch_size)
+            for name in names
+        ),
+        key=lambda item: item[0]
+    )
+    items = list(islice(merged, limit + 1))
+
+    entries = []
+    for (_, rank, _), row in items[:limit]:
+        entry = dict(row)
+        entry['type'] = RANKS[rank]
+        entry['age'] = age_years(
+            entry.pop('birth_lo'), entry.pop('birth_hi'),
+            entry.pop('at_lo'), entry.pop('at_hi')
+        )
+        entries.append(entry)
+
+    next_key = list(items[limit - 1][0]) if len(items) > limit else None
+    return entries, next_key
@@ -0,0 +1,263 @@
+"""
+Streaming export of a user's tree (people, relationships, events).
+
+Every generator here reads through cursors with fetchmany(batch_size)
+and yields text in per-batch chunks, so memory stays flat regardless of
+tree size. Callers are expected to run them inside one read transaction
+so the export is a consistent snapshot.
+"""
+import json
+from datetime import datetime
+from itertools import groupby
+
+from .gedcom import (
+    EVENT_TITLE_TAGS, GENDER_SEX, format_line, format_event
+)
+
+PEOPLE_SQL = """
+    SELECT
+        id, given_name, family_name, photo, other_names, gender,
+        birth_date, death_date,
+        birth_place, birth_lat, birth_lng, birth_digipin,
+        bio, relation,
+        created_at, updated_at
+    FROM People
+    WHERE user_id = ? AND is_deleted = 0
+    ORDER BY id
+"""
+
+RELATIONSHIPS_SQL = """
+    SELECT
+        r.id, r.person1_id, r.person2_id, r.type, r.details,
+        r.start_date, r.end_date, r.created_at, r.updated_at
+    FROM Relationships r
+    JOIN People p1 ON r.person1_id = p1.id
+    JOIN People p2 ON r.person2_id = p2.id
+    WHERE p1.user_id = ?
+      AND p2.user_id = ?
+      AND p1.is_deleted = 0
+      AND p2.is_deleted = 0
+    ORDER BY r.id
+"""
+
+EVENTS_SQL = """
+    SELECT
+        id, title, event_date, place, place_lat, place_lng, place_digipin,
+        description, created_by, created_at, updated_at
+    FROM Events
+    WHERE user_id = ?
+    ORDER BY created_by, id
+"""
+
+
+def iter_rows(conn, sql, params, batch_size):
+    """Yield lists of row dicts, `batch_size` rows at a time."""
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [dict(r) for r in rows]
+
+
+def export_ndjson(conn, user_id, batch_size=1000):
+    """One JSON object per line, tagged with its record type."""
+    yield json.dumps({
+        'record': 'meta',
+        'format': 'familytree-ndjson',
+        'version': 1,
+        'exported_at': datetime.now().isoformat()
+    }) + '\n'
+
+    sources = (
+        ('person', PEOPLE_SQL, (user_id,)),
+        ('relationship', RELATIONSHIPS_SQL, (user_id, user_id)),
+        ('event', EVENTS_SQL, (user_id,)),
+    )
+    for record_type, sql, params in sources:
+        for batch in iter_rows(conn, sql, params, batch_size):
+            yield ''.join(
+                json.dumps({'record': record_type, **row}, default=str) + '\n'
+                for row in batch
+            )
+
+
+def export_gedcom(conn, user_id, parent_types, spouse_types, batch_size=1000):
+    """GEDCOM 5.5.1, UTF-8. Events are written under their person."""
+    yield ''.join([
+        format_line(0, 'HEAD'),
+        format_line(1, 'SOUR', 'FamilyTreeApp'),
+        format_line(1, 'DATE', datetime.now().strftime('%d %b %Y').upper()),
+        format_line(1, 'GEDC'),
+        format_line(2, 'VERS', '5.5.1'),
+        format_line(2, 'FORM', 'LINEAGE-LINKED'),
+        format_line(1, 'CHAR', 'UTF-8'),
+    ])
+
+    # People and their events are merge-joined on person id so neither
+    # side has to be held in memory.
+    events = _iter_flat(iter_rows(conn, EVENTS_SQL, (user_id,), batch_size))
+    pending = next(events, None)
+    while pending is not None and pending['created_by'] is None:
+        pending = next(events, None)
+
+    for batch in iter_rows(conn, PEOPLE_SQL, (user_id,), batch_size):
+        chunk = []
+        for person in batch:
+            person_events = []
+            while pending is not None and pending['created_by'] <= person['id']:
+                if pending['created_by'] == person['id']:
+                    person_events.append(pending)
+                pending = next(events, None)
+            chunk.append(_individual(person, person_events))
+        yield ''.join(chunk)
+
+    chunk = []
+    for number, family in enumerate(_iter_families(conn, user_id, parent_types, spouse_types, batch_size), 1):
+        chunk.append(_family(number, *family))
+        if len(chunk) >= batch_size:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(format_line(0, 'TRLR'))
+    yield ''.join(chunk)
+
+
+def _iter_flat(batches):
+    for batch in batches:
+        yield from batch
+
+
+def _xref(prefix, value):
+    return f'@{prefix}{value}@'
+
+
+def _individual(person, events):
+    given = person['given_name'] or ''
+    family = person['family_name'] or ''
+    out = [
+        format_line(0, 'INDI', xref=_xref('I', person['id'])),
+        format_line(1, 'NAME', f'{given} /{family}/'.strip()),
+    ]
+    if given:
+        out.append(format_line(2, 'GIVN', given))
+    if family:
+        out.append(format_line(2, 'SURN', family))
+    for other in (person['other_names'] or '').split(','):
+        if other.strip():
+            out.append(format_line(1, 'NAME', other.strip()))
+
+    sex = GENDER_SEX.get((person['gender'] or '').strip().lower())
+    if sex:
+        out.append(format_line(1, 'SEX', sex))
+
+    if person['birth_date'] or person['birth_place'] or person['birth_lat'] is not None:
+        out.append(format_event(
+            1, 'BIRT', person['birth_date'], person['birth_place'],
+            person['birth_lat'], person['birth_lng']
+        ))
+    if person['death_date']:
+        out.append(format_event(1, 'DEAT', person['death_date']))
+
+    for event in events:
+        title = event['title'] or ''
+        tag = EVENT_TITLE_TAGS.get(title.lower())
+        if tag in ('OCCU', 'EDUC'):
+            out.append(format_event(
+                1, tag, event['event_date'], event['place'],
+                event['place_lat'], event['place_lng'], value=event['description']
+            ))
+            continue
+        out.append(format_event(
+            1, tag or 'EVEN', event['event_date'], event['place'],
+            event['place_lat'], event['place_lng']
+        ))
+        if tag is None and title:
+            out.append(format_line(2, 'TYPE', title))
+        if event['description']:
+            out.append(format_line(2, 'NOTE', event['description']))
+
+    if person['bio']:
+        out.append(format_line(1, 'NOTE', person['bio']))
+    return ''.join(out)
+
+
+def _family(number, husband, wife, married, divorced, children):
+    out = [format_line(0, 'FAM', xref=_xref('F', number))]
+    if husband is not None:
+        out.append(format_line(1, 'HUSB', _xref('I', husband)))
+    if wife is not None:
+        out.append(format_line(1, 'WIFE', _xref('I', wife)))
+    for child in children:
+        out.append(format_line(1, 'CHIL', _xref('I', child)))
+    if married:
+        out.append(format_event(1, 'MARR', married))
+    if divorced:
+        out.append(format_event(1, 'DIV', divorced))
+    return ''.join(out)
+
+
+def _iter_families(conn, user_id, parent_types, spouse_types, batch_size):
+    """
+    Yield (husband, wife, married, divorced, [children]) built from
+    father/mother and husband/wife relationships. Rows come back sorted
+    by couple so each family is assembled from consecutive rows.
+    """
+    father_type, mother_type = parent_types[0], parent_types[1]
+    husband_type = spouse_types[0]
+    parent_ph = ', '.join('?' for _ in parent_types)
+    spouse_ph = ', '.join('?' for _ in spouse_types)
+
+    sql = f"""
+        WITH owned AS (
+            SELECT r.person1_id, r.person2_id, r.type, r.start_date, r.end_date
+            FROM Relationships r
+            JOIN People p1 ON r.person1_id = p1.id
+            JOIN People p2 ON r.person2_id = p2.id
+            WHERE p1.user_id = ?
+              AND p2.user_id = ?
+              AND p1.is_deleted = 0
+              AND p2.is_deleted = 0
+        ),
+        parents AS (
+            SELECT person2_id AS child,
+                   MAX(CASE WHEN type = ? THEN person1_id END) AS father,
+                   MAX(CASE WHEN type = ? THEN person1_id END) AS mother
+            FROM owned
+            WHERE type IN ({parent_ph})
+            GROUP BY person2_id
+        ),
+        couples AS (
+            SELECT CASE WHEN type = ? THEN person1_id ELSE person2_id END AS husband,
+                   CASE WHEN type = ? THEN person2_id ELSE person1_id END AS wife,
+                   MIN(start_date) AS married,
+                   MIN(end_date) AS divorced
+            FROM owned
+            WHERE type IN ({spouse_ph})
+            GROUP BY 1, 2
+        ),
+        families AS (
+            SELECT father AS husband, mother AS wife, child FROM parents
+            UNION ALL
+            SELECT husband, wife, NULL FROM couples
+        )
+        SELECT f.husband, f.wife, c.married, c.divorced, f.child
+        FROM families f
+        LEFT JOIN couples c ON c.husband IS f.husband AND c.wife IS f.wife
+        ORDER BY f.husband IS NULL, f.husband, f.wife IS NULL, f.wife, f.child
+    """
+    params = [
+        user_id, user_id,
+        father_type, mother_type, *parent_types,
+        husband_type, husband_type, *spouse_types
+    ]
+
+    rows = _iter_flat(iter_rows(conn, sql, params, batch_size))
+    for (husband, wife), group in groupby(rows, key=lambda r: (r['husband'], r['wife'])):
+        married = divorced = None
+        children = []
+        for row in group:
+            married = married or row['married']
+            divorced = divorced or row['divorced']
+            if row['child'] is not None:
+                children.append(row['child'])
+        yield husband, wife, married, divorced, children
@@ -0,0 +1,41 @@
+"""
+Columnar snapshot of a user's whole tree for the tree view.
+
+Each dataset is returned as {"count": n, "columns": {field: [values]}}
+rather than a list of row objects, so field names are sent once instead
+of once per row. Relationships and events point at people by their row
+index in the people columns (person1 / person2 / person) instead of
+carrying ids and joined names; `people.columns.id[i]` recovers the id.
+"""
+from .tree_export import PEOPLE_SQL, RELATIONSHIPS_SQL, EVENTS_SQL
+
+
+def _columns(cur):
+    """Read a cursor into ({field: [values]}, row count)."""
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    if not rows:
+        return {name: [] for name in names}, 0
+    return {name: list(values) for name, values in zip(names, zip(*rows))}, len(rows)
+
+
+def tree_snapshot(conn, user_id):
+    """
+    People, relationships and events of `user_id` as columns. Callers
+    run this inside one read transaction so the three sets agree.
+    """
+    people, people_count = _columns(conn.execute(PEOPLE_SQL, (user_id,)))
+    index = {person_id: i for i, person_id in enumerate(people['id'])}
+
+    rels, rel_count = _columns(conn.execute(RELATIONSHIPS_SQL, (user_id, user_id)))
+    rels['person1'] = [index[i] for i in rels.pop('person1_id')]
+    rels['person2'] = [index[i] for i in rels.pop('person2_id')]
+
+    events, event_count = _columns(conn.execute(EVENTS_SQL, (user_id,)))
+    events['person'] = [index.get(i) for i in events.pop('created_by')]
+
+    return {
+        'people': {'count': people_count, 'columns': people},
+        'relationships': {'count': rel_count, 'columns': rels},
+        'events': {'count': event_count, 'columns': events},
+    }
@@ -1,4 +1,6 @@
 import os
+from io import BytesIO
+from PIL import Image, UnidentifiedImageError
 from werkzeug.utils import secure_filename
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
@@ -8,3 +10,28 @@ def allowed_file(filename):
         '.' in filename and
         filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
     )
+
+
+class UploadError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_image_upload(file, max_bytes):
+    """
+    Read an uploaded image into memory, enforcing `max_bytes` and
+    checking the header only (no pixels are decoded here).
+    """
+    if not file:
+        raise UploadError('No file provided')
+
+    data = file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadError('File too large', 413)
+
+    try:
+        Image.open(BytesIO(data))
+    except UnidentifiedImageError:
+        raise UploadError('Uploaded file is not a valid image')
+    return data
@@ -0,0 +1,16 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- RELATIONSHIPS: Lineage traversal
+-- Covering indexes so each recursive step of the ancestor/descendant
+-- queries is a single index seek on (person, type).
+-- ===============================
+CREATE INDEX IF NOT EXISTS idx_relationships_person2_type
+  ON Relationships(person2_id, type, person1_id);
+
+CREATE INDEX IF NOT EXISTS idx_relationships_person1_type
+  ON Relationships(person1_id, type, person2_id);
+
+COMMIT;
@@ -0,0 +1,24 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- Keyset pagination
+-- Composite indexes matching each list endpoint's sort order so a page
+-- is a range seek from the cursor instead of a sort of the whole table.
+-- ===============================
+CREATE INDEX IF NOT EXISTS idx_people_user_names
+  ON People(user_id, is_deleted, family_name, given_name, id);
+
+-- Relationships carry their owner's user_id (both people always belong
+-- to the same user), so a relationship page is a range seek over the
+-- caller's own rows rather than a walk over every user's.
+ALTER TABLE Relationships ADD COLUMN user_id INTEGER REFERENCES Users(id) ON DELETE CASCADE;
+
+UPDATE Relationships
+SET user_id = (SELECT p.user_id FROM People p WHERE p.id = Relationships.person1_id);
+
+CREATE INDEX IF NOT EXISTS idx_relationships_user_created
+  ON Relationships(user_id, created_at, id);
+
+COMMIT;
@@ -0,0 +1,46 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- PEOPLE: Full-text search
+-- External-content FTS5 index over People, kept in sync by triggers.
+-- ===============================
+CREATE VIRTUAL TABLE IF NOT EXISTS People_fts USING fts5(
+  given_name,
+  family_name,
+  other_names,
+  birth_place,
+  bio,
+  content='People',
+  content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_people_fts_insert
+AFTER INSERT ON People
+BEGIN
+  INSERT INTO People_fts (rowid, given_name, family_name, other_names, birth_place, bio)
+  VALUES (new.id, new.given_name, new.family_name, new.other_names, new.birth_place, new.bio);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_people_fts_delete
+AFTER DELETE ON People
+BEGIN
+  INSERT INTO People_fts (People_fts, rowid, given_name, family_name, other_names, birth_place, bio)
+  VALUES ('delete', old.id, old.given_name, old.family_name, old.other_names, old.birth_place, old.bio);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_people_fts_update
+AFTER UPDATE OF given_name, family_name, other_names, birth_place, bio ON People
+BEGIN
+  INSERT INTO People_fts (People_fts, rowid, given_name, family_name, other_names, birth_place, bio)
+  VALUES ('delete', old.id, old.given_name, old.family_name, old.other_names, old.birth_place, old.bio);
+  INSERT INTO People_fts (rowid, given_name, family_name, other_names, birth_place, bio)
+  VALUES (new.id, new.given_name, new.family_name, new.other_names, new.birth_place, new.bio);
+END;
+
+-- Index rows that existed before this migration
+INSERT INTO People_fts (People_fts) VALUES ('rebuild');
+
+COMMIT;
@@ -0,0 +1,17 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- Drop indexes that are left-prefixes of composite indexes added in
+-- v4/v5, plus the single-column is_deleted index. They serve no query
+-- the composites cannot, and every extra index is another b-tree to
+-- update on each insert (bulk imports).
+-- ===============================
+DROP INDEX IF EXISTS idx_people_user_id;          -- idx_people_user_names
+DROP INDEX IF EXISTS idx_people_is_deleted;       -- two values, never the best access path: every
+                                                  -- People query filters on user_id or id first
+DROP INDEX IF EXISTS idx_relationships_person1;   -- idx_relationships_person1_type
+DROP INDEX IF EXISTS idx_relationships_person2;   -- idx_relationships_person2_type
+
+COMMIT;
@@ -0,0 +1,12 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- USERS: Data version
+-- Bumped on every write to the user's People / Relationships / Events;
+-- GET endpoints derive their ETag from it.
+-- ===============================
+ALTER TABLE Users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0;
+
+COMMIT;
@@ -0,0 +1,26 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- PHOTO JOBS: Background photo processing status
+-- ===============================
+CREATE TABLE IF NOT EXISTS PhotoJobs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  person_id INTEGER,             -- NULL for a user's profile photo
+  user_id INTEGER NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  photo TEXT,
+  error TEXT,
+  created_at TEXT DEFAULT (datetime('now')),
+  updated_at TEXT DEFAULT (datetime('now')),
+  FOREIGN KEY (person_id) REFERENCES People(id) ON DELETE CASCADE,
+  FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_photojobs_user_id ON PhotoJobs(user_id);
+-- person_id is an ON DELETE CASCADE foreign key; without an index every
+-- People delete scans PhotoJobs for child rows
+CREATE INDEX IF NOT EXISTS idx_photojobs_person_id ON PhotoJobs(person_id);
+
+COMMIT;
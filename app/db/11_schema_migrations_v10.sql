@@ -0,0 +1,19 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- SESSIONS
+-- expires_at drives the background sweeper (range delete of expired
+-- rows). idx_sessions_token duplicates the UNIQUE constraint's own
+-- index on session_token, so it only doubled the write cost.
+-- idx_sessions_user_id already ends in the rowid (id), which is what
+-- the per-user session cap orders by.
+-- ===============================
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON Sessions(expires_at);
+DROP INDEX IF EXISTS idx_sessions_token;
+
+-- Purge what has accumulated so far
+DELETE FROM Sessions WHERE expires_at <= strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime');
+
+COMMIT;
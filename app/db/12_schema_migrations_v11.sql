@@ -0,0 +1,89 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- GEO: R*Tree indexes over People birth points and Event places.
+-- The first dimension is the owning user_id (a zero-width interval), so
+-- a viewport query only descends into the caller's own points. R*Tree
+-- stores 32-bit floats, rounded outward; queries re-check the exact
+-- lat/lng on the base row.
+-- ===============================
+CREATE VIRTUAL TABLE IF NOT EXISTS People_geo USING rtree(
+  id,
+  min_user, max_user,
+  min_lat, max_lat,
+  min_lng, max_lng
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_people_geo_insert
+AFTER INSERT ON People
+WHEN new.birth_lat IS NOT NULL AND new.birth_lng IS NOT NULL AND new.is_deleted = 0
+BEGIN
+  INSERT INTO People_geo VALUES (
+    new.id, new.user_id, new.user_id,
+    new.birth_lat, new.birth_lat, new.birth_lng, new.birth_lng
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_people_geo_update
+AFTER UPDATE OF birth_lat, birth_lng, is_deleted, user_id ON People
+BEGIN
+  DELETE FROM People_geo WHERE id = old.id;
+  INSERT INTO People_geo
+  SELECT new.id, new.user_id, new.user_id,
+         new.birth_lat, new.birth_lat, new.birth_lng, new.birth_lng
+  WHERE new.birth_lat IS NOT NULL AND new.birth_lng IS NOT NULL AND new.is_deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_people_geo_delete
+AFTER DELETE ON People
+BEGIN
+  DELETE FROM People_geo WHERE id = old.id;
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS Events_geo USING rtree(
+  id,
+  min_user, max_user,
+  min_lat, max_lat,
+  min_lng, max_lng
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_events_geo_insert
+AFTER INSERT ON Events
+WHEN new.place_lat IS NOT NULL AND new.place_lng IS NOT NULL
+BEGIN
+  INSERT INTO Events_geo VALUES (
+    new.id, new.user_id, new.user_id,
+    new.place_lat, new.place_lat, new.place_lng, new.place_lng
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_geo_update
+AFTER UPDATE OF place_lat, place_lng, user_id ON Events
+BEGIN
+  DELETE FROM Events_geo WHERE id = old.id;
+  INSERT INTO Events_geo
+  SELECT new.id, new.user_id, new.user_id,
+         new.place_lat, new.place_lat, new.place_lng, new.place_lng
+  WHERE new.place_lat IS NOT NULL AND new.place_lng IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_geo_delete
+AFTER DELETE ON Events
+BEGIN
+  DELETE FROM Events_geo WHERE id = old.id;
+END;
+
+-- Index rows that existed before this migration
+INSERT INTO People_geo
+SELECT id, user_id, user_id, birth_lat, birth_lat, birth_lng, birth_lng
+FROM People
+WHERE birth_lat IS NOT NULL AND birth_lng IS NOT NULL AND is_deleted = 0;
+
+INSERT INTO Events_geo
+SELECT id, user_id, user_id, place_lat, place_lat, place_lng, place_lng
+FROM Events
+WHERE place_lat IS NOT NULL AND place_lng IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,45 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- DIGIPIN: canonical form (upper case, hyphens after the 3rd and 6th
+-- symbol) so that a cell's prefix is also a string-range prefix.
+-- ===============================
+UPDATE People
+SET birth_digipin = (
+  WITH k(v) AS (SELECT UPPER(REPLACE(REPLACE(TRIM(birth_digipin), '-', ''), ' ', '')))
+  SELECT CASE
+    WHEN v = '' THEN NULL
+    WHEN length(v) > 6 THEN substr(v, 1, 3) || '-' || substr(v, 4, 3) || '-' || substr(v, 7)
+    WHEN length(v) > 3 THEN substr(v, 1, 3) || '-' || substr(v, 4)
+    ELSE v
+  END FROM k
+)
+WHERE birth_digipin IS NOT NULL;
+
+UPDATE Events
+SET place_digipin = (
+  WITH k(v) AS (SELECT UPPER(REPLACE(REPLACE(TRIM(place_digipin), '-', ''), ' ', '')))
+  SELECT CASE
+    WHEN v = '' THEN NULL
+    WHEN length(v) > 6 THEN substr(v, 1, 3) || '-' || substr(v, 4, 3) || '-' || substr(v, 7)
+    WHEN length(v) > 3 THEN substr(v, 1, 3) || '-' || substr(v, 4)
+    ELSE v
+  END FROM k
+)
+WHERE place_digipin IS NOT NULL;
+
+-- ===============================
+-- Prefix indexes: "everything in cell X" and "count per cell at
+-- precision n" become range scans of one user's slice.
+-- ===============================
+CREATE INDEX IF NOT EXISTS idx_people_user_digipin
+  ON People(user_id, birth_digipin)
+  WHERE birth_digipin IS NOT NULL AND is_deleted = 0;
+
+CREATE INDEX IF NOT EXISTS idx_events_user_digipin
+  ON Events(user_id, place_digipin)
+  WHERE place_digipin IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,40 @@
+PRAGMA foreign_keys = ON;
+
+BEGIN TRANSACTION;
+
+-- ===============================
+-- Normalized dates: every free-form date gets an inclusive Julian Day
+-- range (see backend/utils/dates.py). The text stays the source of
+-- truth; the ranges are filled on every write and backfilled by
+-- 15_backfill_julian_dates.py.
+-- ===============================
+ALTER TABLE People ADD COLUMN birth_jd_lo INTEGER;
+ALTER TABLE People ADD COLUMN birth_jd_hi INTEGER;
+ALTER TABLE People ADD COLUMN death_jd_lo INTEGER;
+ALTER TABLE People ADD COLUMN death_jd_hi INTEGER;
+
+ALTER TABLE Events ADD COLUMN event_jd_lo INTEGER;
+ALTER TABLE Events ADD COLUMN event_jd_hi INTEGER;
+
+ALTER TABLE Relationships ADD COLUMN start_jd_lo INTEGER;
+ALTER TABLE Relationships ADD COLUMN start_jd_hi INTEGER;
+ALTER TABLE Relationships ADD COLUMN end_jd_lo INTEGER;
+ALTER TABLE Relationships ADD COLUMN end_jd_hi INTEGER;
+
+-- Date-ordered walks: the timeline, the event list and range filters.
+CREATE INDEX IF NOT EXISTS idx_people_user_birth_jd
+  ON People(user_id, birth_jd_lo, id)
+  WHERE is_deleted = 0 AND birth_jd_lo IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_people_user_death_jd
+  ON People(user_id, death_jd_lo, id)
+  WHERE is_deleted = 0 AND death_jd_lo IS NOT NULL;
+
+-- Undated events sort last (as -1) in the newest-first event list
+CREATE INDEX IF NOT EXISTS idx_events_user_jd
+  ON Events(user_id, IFNULL(event_jd_lo, -1), id);
+
+-- A left-prefix of idx_events_user_jd
+DROP INDEX IF EXISTS idx_events_user_id;
+
+COMMIT;
@@ -0,0 +1,33 @@
+"""
+Fill the *_jd_lo / *_jd_hi columns added in v13 from the existing
+free-form date text.
+"""
+from backend.utils.dates import parse_date_range
+
+BATCH_SIZE = 5000
+
+TABLES = (
+    ('People', ('birth_date', 'death_date'), ('birth', 'death')),
+    ('Events', ('event_date',), ('event',)),
+    ('Relationships', ('start_date', 'end_date'), ('start', 'end')),
+)
+
+
+def migrate(conn):
+    for table, columns, prefixes in TABLES:
+        assignments = ', '.join(f'{p}_jd_lo = ?, {p}_jd_hi = ?' for p in prefixes)
+        update = f'UPDATE {table} SET {assignments} WHERE id = ?'
+        not_null = ' OR '.join(f'{c} IS NOT NULL' for c in columns)
+
+        cur = conn.execute(f"SELECT id, {', '.join(columns)} FROM {table} WHERE {not_null}")
+        while True:
+            rows = cur.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                values = []
+                for text in row[1:]:
+                    values.extend(parse_date_range(text))
+                params.append((*values, row[0]))
+            conn.executemany(update, params)
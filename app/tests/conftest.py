@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app as `backend`, like `python -m backend.main` from app/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def app(tmp_path):
+    from backend import create_app
+    from backend.config import Config
+
+    class TestConfig(Config):
+        TESTING = True
+        DB_PATH = str(tmp_path / 'test.db')
+        SESSION_SWEEP_INTERVAL = 0
+        SCRYPT_N = 2 ** 10
+
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register and log in a user; returns its Authorization header."""
+    client.post('/api/auth/register', json={
+        'username': 'alice', 'password': 'secret1', 'email': 'alice@example.com'
+    })
+    token = client.post('/api/auth/login', json={
+        'username': 'alice', 'password': 'secret1'
+    }).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
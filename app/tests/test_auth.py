@@ -0,0 +1,30 @@
+def test_token_required(client, auth_headers):
+    assert client.get('/api/people').status_code == 401
+    assert client.get('/api/people', headers=auth_headers).status_code == 200
+
+
+def test_user_does_not_outlive_its_request_in_one_app_context(app, client, auth_headers):
+    # The test client shares a pushed app context (and so `g`) between requests
+    with app.app_context():
+        assert client.get('/api/people', headers=auth_headers).status_code == 200
+        assert client.get('/api/people').status_code == 401
+
+        assert client.post('/api/auth/logout', headers=auth_headers).status_code == 200
+        assert client.get('/api/people').status_code == 401
+        assert client.get('/api/people', headers=auth_headers).status_code == 401
+
+
+def test_batch_operations_run_as_the_caller(app, client, auth_headers):
+    with app.app_context():
+        response = client.post('/api/batch', headers=auth_headers, json={'operations': [
+            {'method': 'POST', 'path': '/api/people', 'ref': 'p',
+             'body': {'given_name': 'Ada', 'family_name': 'King'}},
+            {'method': 'GET', 'path': '/api/people/$p'},
+        ]})
+        assert response.status_code == 200
+        assert response.get_json()['results'][1]['body']['data']['given_name'] == 'Ada'
+
+        assert client.get('/api/people').status_code == 401
+        assert client.post('/api/batch', json={'operations': [
+            {'method': 'GET', 'path': '/api/people'}
+        ]}).status_code == 401
@@ -0,0 +1,34 @@
+from backend.database import close_db_connection, get_db_connection
+
+
+class Trace:
+    """Stands in for utils/sql_trace.RequestTrace."""
+
+    def __init__(self):
+        self.statements = []
+        self.finished_with = None
+
+    def __call__(self, conn, sql, parameters, seconds):
+        self.statements.append(sql)
+
+    def finish(self):
+        self.finished_with = list(self.statements)
+
+
+def test_unread_query_is_reported_before_the_connection_is_released(app):
+    with app.app_context():
+        conn = get_db_connection()
+        conn.take_sql_counters()
+        conn.on_statement = trace = Trace()
+
+        cursor = conn.execute("SELECT 1 UNION ALL SELECT 2")
+        cursor.fetchone()
+        assert trace.statements == []
+
+        close_db_connection()
+        assert trace.finished_with == ["SELECT 1 UNION ALL SELECT 2"]
+        assert conn.take_sql_counters()[0] == 1
+
+        # Reading the rest later does not count the query again
+        cursor.fetchall()
+        assert conn.take_sql_counters()[0] == 0
@@ -0,0 +1,106 @@
+import pytest
+
+from backend.utils.dates import (
+    APPROX_YEARS, OPEN_YEARS, age_years, gregorian_date, julian_day,
+    parse_date_range, parse_window
+)
+
+
+def jd(year, month, day):
+    return julian_day(year, month, day)
+
+
+def dates(text):
+    """parse_date_range as Gregorian (lo, hi) tuples, for readable asserts."""
+    lo, hi = parse_date_range(text)
+    return gregorian_date(lo), gregorian_date(hi)
+
+
+@pytest.mark.parametrize('year, month, day', [
+    (-4713, 11, 24), (1, 1, 1), (1582, 10, 15), (1700, 2, 28), (1900, 2, 28),
+    (2000, 2, 29), (2024, 12, 31),
+])
+def test_gregorian_date_inverts_julian_day(year, month, day):
+    assert gregorian_date(julian_day(year, month, day)) == (year, month, day)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1880', ((1880, 1, 1), (1880, 12, 31))),
+    ('1880s', ((1880, 1, 1), (1889, 12, 31))),
+    ('JAN 1880', ((1880, 1, 1), (1880, 1, 31))),
+    ('Feb 1880', ((1880, 2, 1), (1880, 2, 29))),
+    ('12 JAN 1880', ((1880, 1, 12), (1880, 1, 12))),
+    ('1880-02', ((1880, 2, 1), (1880, 2, 29))),
+    ('1880-01-12', ((1880, 1, 12), (1880, 1, 12))),
+    ('1880-01-12T10:30:00', ((1880, 1, 12), (1880, 1, 12))),
+    ('BET 1880 AND 1885', ((1880, 1, 1), (1885, 12, 31))),
+    ('BET 1885 AND 1880', ((1880, 1, 1), (1885, 12, 31))),
+    ('FROM 1880 TO 1885', ((1880, 1, 1), (1885, 12, 31))),
+    ('INT 12 JAN 1880 (twelfth of January)', ((1880, 1, 12), (1880, 1, 12))),
+    ('1700/01', ((1700, 1, 1), (1701, 12, 31))),
+    ('12 FEB 1700/01', ((1700, 2, 12), (1700, 2, 12))),
+])
+def test_parse_date_range(text, expected):
+    assert dates(text) == expected
+
+
+def test_qualified_dates_widen_the_range():
+    lo, hi = parse_date_range('1880')
+    approx = parse_date_range('ABT 1880')
+    assert approx[0] < lo and approx[1] > hi
+    assert parse_date_range('abt. 1880') == parse_date_range('CIRCA 1880') == approx
+    assert round((lo - approx[0]) / 365.2425) == APPROX_YEARS
+
+    before = parse_date_range('BEF 1880')
+    assert before[1] == lo - 1
+    assert round((lo - before[0]) / 365.2425) == OPEN_YEARS
+
+    after = parse_date_range('AFT 1880')
+    assert after[0] == hi + 1
+    assert round((after[1] - hi) / 365.2425) == OPEN_YEARS
+
+    assert parse_date_range('FROM 1880')[0] == lo
+    assert parse_date_range('TO 1880')[1] == hi
+
+
+def test_julian_calendar_dates():
+    # Julian 1 Jan 1700 is Gregorian 11 Jan 1700
+    assert dates('@#DJULIAN@ 1 JAN 1700') == ((1700, 1, 11), (1700, 1, 11))
+    assert dates('@#DGREGORIAN@ 1 JAN 1700') == ((1700, 1, 1), (1700, 1, 1))
+
+
+@pytest.mark.parametrize('text', [
+    None, '', '   ', 'unknown', '(stillborn)', 'BEF', 'BET 1880', '31 FEB 1880',
+    '1880-13', '1880-02-30', 'SPRING 1880', 'ABT sometime',
+])
+def test_unparseable_dates(text):
+    assert parse_date_range(text) == (None, None)
+
+
+def test_parse_window():
+    assert parse_window('1850', '1900') == (jd(1850, 1, 1), jd(1900, 12, 31))
+    assert parse_window('1850-06', None) == (jd(1850, 6, 1), None)
+    assert parse_window(None, None) == (None, None)
+    with pytest.raises(ValueError):
+        parse_window('whenever', None)
+
+
+@pytest.mark.parametrize('birth, later, age', [
+    ('1900-06-15', '1950-06-15', 50),
+    ('1900-06-15', '1950-06-14', 49),
+    ('1897-03-01', '1901-03-01', 4),
+    ('2000-02-29', '2001-02-28', 0),
+    ('2000-02-29', '2001-03-01', 1),
+    ('1890', '1950', 60),
+    ('1890', '1952', 62),
+    ('1892', '1950', 58),
+    ('ABT 1890', '1950', 60),
+    ('JUN 1900', '1950-06-30', 50),
+])
+def test_age_years(birth, later, age):
+    assert age_years(*parse_date_range(birth), *parse_date_range(later)) == age
+
+
+def test_age_years_unknown():
+    assert age_years(*parse_date_range('1890'), None, None) is None
+    assert age_years(None, None, *parse_date_range('1950')) is None